@@ -0,0 +1,137 @@
+from json import dumps
+from math import ceil
+
+from numpy import int8, where
+from numpy.random import default_rng
+from pandas import DataFrame
+
+PHISING_FEATURES = [
+    "having_IP_Address",
+    "URL_Length",
+    "Shortining_Service",
+    "having_At_Symbol",
+    "double_slash_redirecting",
+    "Prefix_Suffix",
+    "having_Sub_Domain",
+    "SSLfinal_State",
+    "Domain_registeration_length",
+    "Favicon",
+    "port",
+    "HTTPS_token",
+    "Request_URL",
+    "URL_of_Anchor",
+    "Links_in_tags",
+    "SFH",
+    "Submitting_to_email",
+    "Abnormal_URL",
+    "Redirect",
+    "on_mouseover",
+    "RightClick",
+    "popUpWidnow",
+    "Iframe",
+    "age_of_domain",
+    "DNSRecord",
+    "web_traffic",
+    "Page_Rank",
+    "Google_Index",
+    "Links_pointing_to_page",
+    "Statistical_report",
+]
+
+
+class Data_Generator:
+    """
+    Description :   This class is used for generating synthetic batch files in the phising schema, along with the
+                    schema and regex files, and writing them to the storage backend used by the pipeline
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, config: dict, storage, seed: int = 42, missing_ratio=0.01):
+        self.config = config
+
+        self.storage = storage
+
+        self.rng = default_rng(seed)
+
+        self.missing_ratio = missing_ratio
+
+        self.target_col = self.config["base"]["target_col"]
+
+        self.input_files_bucket = self.config["s3_bucket"]["input_files"]
+
+        self.raw_data_bucket = self.config["s3_bucket"]["phising_raw_data"]
+
+        self.date_stamp = "08012020"
+
+    def get_schema(self, with_target: bool):
+        cols = PHISING_FEATURES + ([self.target_col] if with_target else [])
+
+        return {
+            "SampleFileName": f"phising_{self.date_stamp}_120000.csv",
+            "LengthOfDateStampInFile": len(self.date_stamp),
+            "LengthOfTimeStampInFile": 6,
+            "NumberofColumns": len(cols),
+            "ColName": {col: "Integer" for col in cols},
+        }
+
+    def write_control_files(self):
+        for kind, with_target in (("train", True), ("pred", False)):
+            self.storage.put(
+                self.input_files_bucket,
+                self.config["schema_file"][kind],
+                dumps(self.get_schema(with_target)).encode(),
+            )
+
+        self.storage.put(
+            self.input_files_bucket,
+            self.config["regex_file"],
+            r"^phising_\d{8}_\d{6}\.csv$".encode(),
+        )
+
+    def get_batch(self, n_rows: int, with_target: bool):
+        X = self.rng.integers(-1, 2, size=(n_rows, len(PHISING_FEATURES)), dtype=int8)
+
+        df = DataFrame(X, columns=PHISING_FEATURES)
+
+        if with_target:
+            score = X[:, :8].sum(axis=1) + self.rng.normal(0, 1.5, n_rows)
+
+            df[self.target_col] = where(score > 0, 1, -1).astype(int8)
+
+        if self.missing_ratio > 0:
+            mask = self.rng.random(size=(n_rows, len(PHISING_FEATURES)))
+
+            df[PHISING_FEATURES] = df[PHISING_FEATURES].mask(
+                mask < self.missing_ratio, "?"
+            )
+
+        return df
+
+    def write_batch_files(self, n_rows: int, n_files: int, kind: str):
+        raw_dir = self.config["data"]["raw_data"][
+            "train_batch" if kind == "train" else "pred_batch"
+        ]
+
+        rows_per_file = ceil(n_rows / n_files)
+
+        written_rows = 0
+
+        for idx in range(n_files):
+            rows = min(rows_per_file, n_rows - written_rows)
+
+            if rows <= 0:
+                break
+
+            df = self.get_batch(rows, with_target=kind == "train")
+
+            fname = f"{raw_dir}/phising_{self.date_stamp}_{idx:06d}.csv"
+
+            self.storage.put(
+                self.raw_data_bucket, fname, df.to_csv(index=None).encode()
+            )
+
+            written_rows += rows
+
+        return written_rows
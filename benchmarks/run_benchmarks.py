@@ -0,0 +1,382 @@
+"""
+Benchmark harness for the end-to-end train and predict pipelines.
+
+The pipelines are run on the local or memory storage backend and the in-memory
+MongoDB stand-in, with synthetic batch files in the phising schema. Every stage
+is timed in place, with its peak resident memory sampled in the background
+instead of traced, and a json report is written which can be compared against
+a saved baseline.
+
+    python benchmarks/run_benchmarks.py --rows 100000 --files 100 --output report.json
+    python benchmarks/run_benchmarks.py --rows 100000 --files 100 --baseline report.json
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump, load
+from os import chdir, environ, getcwd, makedirs
+from os.path import abspath, dirname, join
+from platform import platform, python_version
+from sys import exit, path
+from time import perf_counter
+
+from yaml import safe_dump, safe_load
+
+REPO_DIR = dirname(dirname(abspath(__file__)))
+
+TRAIN_STAGES = {
+    "validation": (
+        "phising.raw_data_validation.train_data_validation.Raw_Train_Data_Validation",
+        [
+            "values_from_schema",
+            "get_regex_pattern",
+            "validate_raw_file_name",
+            "validate_col_length",
+            "validate_missing_values_in_col",
+        ],
+    ),
+    "ingestion": (
+        "phising.data_type_valid.data_type_valid_train.DB_Operation_Train",
+        ["insert_good_data_as_record"],
+    ),
+    "export": (
+        "phising.data_type_valid.data_type_valid_train.DB_Operation_Train",
+        ["export_collection_to_csv"],
+    ),
+    "preprocessing": (
+        "phising.data_preprocessing.preprocessing.Preprocessor",
+        [
+            "replace_invalid_values",
+            "separate_label_feature",
+            "is_null_present",
+            "fit_imputer",
+            "impute_missing_values",
+            "wait_for_null_report",
+        ],
+    ),
+    "elbow": (
+        "phising.data_preprocessing.clustering.KMeans_Clustering",
+        ["draw_elbow_plot", "create_clusters", "save_elbow_plot"],
+    ),
+    "tuning": ("utils.model_utils.Model_Utils", ["train_and_log_models"]),
+    "model_logs": (
+        "phising.mlflow_utils.mlflow_operations.MLFlow_Operation",
+        ["wait_for_model_logs"],
+    ),
+    "registry": (
+        "phising.model.load_production_model.Load_Prod_Model",
+        ["load_production_model"],
+    ),
+}
+
+PRED_STAGES = {
+    "validation": (
+        "phising.raw_data_validation.pred_data_validation.Raw_Pred_Data_Validation",
+        [
+            "values_from_schema",
+            "get_regex_pattern",
+            "validate_raw_file_name",
+            "validate_col_length",
+            "validate_missing_values_in_col",
+        ],
+    ),
+    "ingestion": (
+        "phising.data_type_valid.data_type_valid_pred.DB_Operation_Pred",
+        ["insert_good_data_as_record"],
+    ),
+    "export": (
+        "phising.data_type_valid.data_type_valid_pred.DB_Operation_Pred",
+        ["export_collection_to_csv"],
+    ),
+    "prediction": (
+        "phising.model.prediction_from_model.Prediction",
+        ["predict_from_model"],
+    ),
+}
+
+
+def get_args():
+    parser = ArgumentParser(description="Benchmark the train and predict pipelines")
+
+    parser.add_argument("--rows", type=int, default=10000)
+
+    parser.add_argument("--files", type=int, default=10)
+
+    parser.add_argument("--pred-rows", type=int, default=None)
+
+    parser.add_argument("--pred-files", type=int, default=None)
+
+    parser.add_argument("--missing-ratio", type=float, default=0.01)
+
+    parser.add_argument("--seed", type=int, default=42)
+
+    parser.add_argument("--storage", choices=["local", "memory"], default="local")
+
+    parser.add_argument("--workdir", default=join("benchmarks", "workdir"))
+
+    parser.add_argument("--output", default=None)
+
+    parser.add_argument("--baseline", default=None)
+
+    parser.add_argument("--tolerance", type=float, default=0.1)
+
+    parser.add_argument("--min-seconds", type=float, default=0.05)
+
+    parser.add_argument("--skip-predict", action="store_true")
+
+    return parser.parse_args()
+
+
+def write_params(workdir: str, storage: str):
+    """
+    Method Name :   write_params
+    Description :   This method writes the params.yaml of the benchmark workdir, which is the repo params.yaml with the
+                    storage and mongodb backends set to the stand-ins
+
+    Output      :   The config of the benchmark is returned
+    On Failure  :   Raise an exception
+    """
+    with open(join(REPO_DIR, "params.yaml")) as f:
+        config = safe_load(f)
+
+    config["storage"]["backend"] = storage
+
+    config["storage"]["local_dir"] = "storage"
+
+    config["mongodb"]["backend"] = "memory"
+
+    with open(join(workdir, "params.yaml"), "w") as f:
+        safe_dump(config, f, sort_keys=False)
+
+    return config
+
+
+def run_pipeline(name: str, stages: dict, func):
+    """
+    Method Name :   run_pipeline
+    Description :   This method runs the pipeline with every stage instrumented, the error of the pipeline is recorded
+                    in the report instead of being raised, so that the stages which did run are still reported
+
+    Output      :   A dictionary with the pipeline status, total seconds and the stage timings is returned
+    On Failure  :   Raise an exception
+    """
+    from benchmarks.stage_timer import Stage_Timer
+
+    timer = Stage_Timer()
+
+    for stage, (class_path, method_names) in stages.items():
+        timer.instrument(stage, class_path, method_names)
+
+    result = {"status": "ok", "error": None}
+
+    start = perf_counter()
+
+    try:
+        func()
+
+    except Exception as e:
+        result["status"] = "error"
+
+        result["error"] = f"{e.__class__.__name__}: {e}"
+
+    finally:
+        result["seconds"] = perf_counter() - start
+
+        timer.restore()
+
+    result["stages"] = timer.stages
+
+    print(
+        f"{name} pipeline finished with {result['status']} in {result['seconds']:.2f} s"
+    )
+
+    return result
+
+
+def run_train(config: dict):
+    from phising.model.load_production_model import Load_Prod_Model
+    from phising.model.training_model import Train_Model
+    from phising.validation_insertion.train_validation_insertion import (
+        Train_Validation,
+    )
+
+    Train_Validation(config["s3_bucket"]["phising_raw_data"]).training_validation()
+
+    train_model = Train_Model()
+
+    num_clusters = train_model.training_model()
+
+    Load_Prod_Model(
+        num_clusters=num_clusters, run_id=train_model.session_run_id
+    ).load_production_model()
+
+
+def run_predict(config: dict):
+    from phising.model.prediction_from_model import Prediction
+    from phising.validation_insertion.prediction_validation_insertion import (
+        Pred_Validation,
+    )
+
+    Pred_Validation(config["s3_bucket"]["phising_raw_data"]).prediction_validation()
+
+    Prediction().predict_from_model()
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float, min_seconds: float):
+    """
+    Method Name :   compare_reports
+    Description :   This method compares the stage timings of the report against the baseline. A stage is regressed
+                    when it is slower than the baseline by more than tolerance and by more than min_seconds
+
+    Output      :   A list of stage comparisons is returned
+    On Failure  :   Raise an exception
+    """
+    comparison = []
+
+    for pipeline, result in report["pipelines"].items():
+        base_result = baseline.get("pipelines", {}).get(pipeline, {})
+
+        for stage, timing in result["stages"].items():
+            base_timing = base_result.get("stages", {}).get(stage)
+
+            if base_timing is None:
+                continue
+
+            diff = timing["seconds"] - base_timing["seconds"]
+
+            ratio = timing["seconds"] / max(base_timing["seconds"], 1e-9)
+
+            comparison.append(
+                {
+                    "stage": f"{pipeline}.{stage}",
+                    "seconds": timing["seconds"],
+                    "baseline_seconds": base_timing["seconds"],
+                    "ratio": ratio,
+                    "regressed": ratio > 1 + tolerance and diff > min_seconds,
+                }
+            )
+
+    return comparison
+
+
+def main():
+    args = get_args()
+
+    output = abspath(args.output) if args.output else None
+
+    baseline_file = abspath(args.baseline) if args.baseline else None
+
+    workdir = abspath(args.workdir)
+
+    makedirs(workdir, exist_ok=True)
+
+    config = write_params(workdir, args.storage)
+
+    cwd = getcwd()
+
+    chdir(workdir)
+
+    path.insert(0, REPO_DIR)
+
+    environ.setdefault("MLFLOW_TRACKING_URI", "sqlite:///" + join(workdir, "mlflow.db"))
+
+    from benchmarks.data_generator import Data_Generator
+    from phising.s3_bucket_operations.storage_backends import get_storage_backend
+
+    storage = get_storage_backend(config["storage"])
+
+    generator = Data_Generator(config, storage, args.seed, args.missing_ratio)
+
+    start = perf_counter()
+
+    generator.write_control_files()
+
+    train_rows = generator.write_batch_files(args.rows, args.files, "train")
+
+    pred_rows = generator.write_batch_files(
+        args.pred_rows or args.rows, args.pred_files or args.files, "pred"
+    )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": python_version(),
+            "platform": platform(),
+            "storage": args.storage,
+            "seed": args.seed,
+            "train_rows": train_rows,
+            "train_files": args.files,
+            "pred_rows": pred_rows,
+            "pred_files": args.pred_files or args.files,
+            "missing_ratio": args.missing_ratio,
+        },
+        "generation_seconds": perf_counter() - start,
+        "pipelines": {},
+    }
+
+    report["pipelines"]["train"] = run_pipeline(
+        "train", TRAIN_STAGES, lambda: run_train(config)
+    )
+
+    if not args.skip_predict:
+        report["pipelines"]["predict"] = run_pipeline(
+            "predict", PRED_STAGES, lambda: run_predict(config)
+        )
+
+    try:
+        from resource import RUSAGE_SELF, getrusage
+
+        report["peak_rss_mb"] = getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+    except ImportError:
+        report["peak_rss_mb"] = None
+
+    chdir(cwd)
+
+    regressed = False
+
+    if baseline_file is not None:
+        with open(baseline_file) as f:
+            baseline = load(f)
+
+        report["comparison"] = compare_reports(
+            report, baseline, args.tolerance, args.min_seconds
+        )
+
+        for row in report["comparison"]:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+
+            print(
+                f"{row['stage']:<28} {row['seconds']:>10.3f} s  "
+                f"baseline {row['baseline_seconds']:>10.3f} s  "
+                f"x{row['ratio']:.2f}  {flag}"
+            )
+
+        regressed = any(row["regressed"] for row in report["comparison"])
+
+    for pipeline, result in report["pipelines"].items():
+        for stage, timing in result["stages"].items():
+            print(
+                f"{pipeline + '.' + stage:<28} {timing['seconds']:>10.3f} s  "
+                f"calls {timing['calls']:>4}  peak {timing['peak_memory_mb']:>9.1f} MB"
+            )
+
+    if output is not None:
+        with open(output, "w") as f:
+            dump(report, f, indent=4)
+
+        print(f"Benchmark report written to {output}")
+
+    failed = False
+
+    for pipeline, result in report["pipelines"].items():
+        if result["status"] == "error":
+            print(f"{pipeline} pipeline failed with {result['error']}")
+
+            failed = True
+
+    return 1 if regressed or failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,131 @@
+from functools import wraps
+from importlib import import_module
+from os import sysconf
+from threading import Event, Lock, Thread, local
+from time import perf_counter
+
+
+def get_rss_mb():
+    """
+    Method Name :   get_rss_mb
+    Description :   This method gets the resident set size of the process from /proc/self/statm
+
+    Output      :   The resident set size in MB is returned, or None when /proc is not available
+    On Failure  :   Raise an exception
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+
+        return pages * sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Stage_Timer:
+    """
+    Description :   This class is used for timing the pipeline stages. The methods of every stage are wrapped in place,
+                    and the wall time, the number of calls and the peak resident memory of the stage are recorded.
+                    A call made while another stage method is running is counted in the outer stage only.
+
+                    The memory is sampled from a background thread every sample_interval seconds instead of being
+                    traced, so the timed run is not slowed down by tracing, and the peak is measured per stage on
+                    every python version
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, sample_interval: float = 0.01):
+        self.stages = {}
+
+        self.originals = []
+
+        self.active = local()
+
+        self.sample_interval = sample_interval
+
+        self.running = {}
+
+        self.running_lock = Lock()
+
+        self.stop_sampling = Event()
+
+        self.sampler = Thread(target=self.sample_memory, daemon=True)
+
+        self.sampler.start()
+
+    def sample_memory(self):
+        while not self.stop_sampling.wait(self.sample_interval):
+            rss_mb = get_rss_mb()
+
+            if rss_mb is None:
+                return
+
+            with self.running_lock:
+                for call_id, peak_mb in self.running.items():
+                    self.running[call_id] = max(peak_mb, rss_mb)
+
+    def instrument(self, stage: str, class_path: str, method_names: list):
+        module_name, class_name = class_path.rsplit(".", 1)
+
+        cls = getattr(import_module(module_name), class_name)
+
+        for method_name in method_names:
+            func = getattr(cls, method_name)
+
+            self.originals.append((cls, method_name, func))
+
+            setattr(cls, method_name, self.wrap(stage, func))
+
+    def wrap(self, stage: str, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            if getattr(self.active, "stage", None) is not None:
+                return func(*args, **kwargs)
+
+            self.active.stage = stage
+
+            call_id = object()
+
+            with self.running_lock:
+                self.running[call_id] = get_rss_mb() or 0.0
+
+            start = perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                seconds = perf_counter() - start
+
+                with self.running_lock:
+                    peak_mb = max(self.running.pop(call_id), get_rss_mb() or 0.0)
+
+                self.record(stage, seconds, peak_mb)
+
+                self.active.stage = None
+
+        return timed
+
+    def record(self, stage: str, seconds: float, peak_mb: float):
+        entry = self.stages.setdefault(
+            stage, {"seconds": 0.0, "calls": 0, "peak_memory_mb": 0.0}
+        )
+
+        entry["seconds"] += seconds
+
+        entry["calls"] += 1
+
+        entry["peak_memory_mb"] = max(entry["peak_memory_mb"], peak_mb)
+
+    def restore(self):
+        for cls, method_name, func in reversed(self.originals):
+            setattr(cls, method_name, func)
+
+        self.originals = []
+
+        self.stop_sampling.set()
+
+        self.sampler.join()
@@ -0,0 +1,173 @@
+"""
+Latency benchmark for the flattened tree ensembles of the production bundle.
+
+A RandomForestClassifier and an XGBClassifier are trained on synthetic rows in
+the phising schema, flattened with Tree_Exporter, and the predict latency of
+the model and of the served model is timed for batches of 1, 100 and 100000
+rows. The served model is the flattened ensemble, which hands the batches of
+more than tree_ensemble.max_flat_rows rows back to the model. The predictions
+of both are checked to be identical, and the served model must not be slower
+than the model at any batch size.
+
+    python benchmarks/tree_latency.py --train-rows 10000 --output latency.json
+"""
+
+from argparse import ArgumentParser
+from json import dump
+from os import chdir, getcwd
+from os.path import abspath, dirname
+from statistics import median
+from sys import exit, path
+from time import perf_counter
+
+REPO_DIR = dirname(dirname(abspath(__file__)))
+
+BATCH_SIZES = [1, 100, 100000]
+
+
+def get_args():
+    parser = ArgumentParser(description="Benchmark the flattened tree ensembles")
+
+    parser.add_argument("--train-rows", type=int, default=10000)
+
+    parser.add_argument("--n-estimators", type=int, default=100)
+
+    parser.add_argument("--max-depth", type=int, default=8)
+
+    parser.add_argument("--repeat", type=int, default=20)
+
+    parser.add_argument("--seed", type=int, default=42)
+
+    parser.add_argument("--tolerance", type=float, default=0.1)
+
+    parser.add_argument("--output", default=None)
+
+    return parser.parse_args()
+
+
+def time_predict(predict, X, repeat: int):
+    """
+    Method Name :   time_predict
+    Description :   This method times predict on the rows, the batches of 100000 rows are run only a few times
+
+    Output      :   The median seconds and the predictions are returned
+    On Failure  :   Raise an exception
+    """
+    pred = predict(X)
+
+    seconds = []
+
+    for _ in range(max(1, repeat if len(X) < 10000 else repeat // 10)):
+        start = perf_counter()
+
+        predict(X)
+
+        seconds.append(perf_counter() - start)
+
+    return median(seconds), pred
+
+
+def main():
+    args = get_args()
+
+    output = abspath(args.output) if args.output else None
+
+    cwd = getcwd()
+
+    chdir(REPO_DIR)
+
+    path.insert(0, REPO_DIR)
+
+    from numpy import array_equal
+    from sklearn.ensemble import RandomForestClassifier
+    from xgboost import XGBClassifier
+
+    from benchmarks.data_generator import PHISING_FEATURES, Data_Generator
+    from phising.model.tree_ensemble import Tree_Exporter
+    from utils.read_params import read_params
+
+    config = read_params()
+
+    generator = Data_Generator(config, None, args.seed, missing_ratio=0)
+
+    train = generator.get_batch(args.train_rows, with_target=True)
+
+    X, Y = train[PHISING_FEATURES], train[config["base"]["target_col"]]
+
+    models = [
+        RandomForestClassifier(
+            n_estimators=args.n_estimators,
+            max_depth=args.max_depth,
+            random_state=args.seed,
+        ),
+        XGBClassifier(
+            objective="binary:logistic",
+            n_estimators=args.n_estimators,
+            max_depth=args.max_depth,
+            random_state=args.seed,
+        ),
+    ]
+
+    exporter = Tree_Exporter("tree_latency.log")
+
+    report = {"meta": vars(args), "models": {}}
+
+    failed = False
+
+    for model in models:
+        model_name = model.__class__.__name__
+
+        model.fit(X, Y)
+
+        flat_model = exporter.export_model(model, PHISING_FEATURES)
+
+        report["models"][model_name] = {"flattened": flat_model is not model}
+
+        for n_rows in BATCH_SIZES:
+            batch = generator.get_batch(n_rows, with_target=False).astype(float)
+
+            model_seconds, model_pred = time_predict(model.predict, batch, args.repeat)
+
+            flat_seconds, flat_pred = time_predict(
+                flat_model.predict, batch, args.repeat
+            )
+
+            identical = array_equal(model_pred, flat_pred)
+
+            ## The served model is slower when it loses to the model by more than the timing tolerance
+
+            slower = flat_seconds > model_seconds * (1 + args.tolerance)
+
+            failed = failed or not identical or slower
+
+            is_flat = flat_model is not model and n_rows <= flat_model.max_flat_rows
+
+            report["models"][model_name][n_rows] = {
+                "served_by": "flat" if is_flat else "model",
+                "model_seconds": model_seconds,
+                "flat_seconds": flat_seconds,
+                "speedup": model_seconds / max(flat_seconds, 1e-9),
+                "identical": identical,
+                "slower": slower,
+            }
+
+            print(
+                f"{model_name:<24} rows {n_rows:>7}  model {model_seconds * 1e3:>9.3f} ms  "
+                f"{'flat' if is_flat else 'model':>5} {flat_seconds * 1e3:>9.3f} ms  "
+                f"x{model_seconds / max(flat_seconds, 1e-9):.2f}  identical {identical}"
+                f"{'  SLOWER' if slower else ''}"
+            )
+
+    chdir(cwd)
+
+    if output is not None:
+        with open(output, "w") as f:
+            dump(report, f, indent=4)
+
+        print(f"Latency report written to {output}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
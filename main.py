@@ -1,4 +1,5 @@
 from json import loads
+from os import environ
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,12 +7,7 @@ from fastapi.responses import Response
 from fastapi.templating import Jinja2Templates
 from uvicorn import run
 
-from phising.model.load_production_model import Load_Prod_Model
-from phising.model.prediction_from_model import Prediction
-from phising.model.training_model import Train_Model
-from phising.validation_insertion.prediction_validation_insertion import Pred_Validation
-from phising.validation_insertion.train_validation_insertion import Train_Validation
-from utils.main_utils import Main_Utils
+from utils.import_utils import Import_Utils
 from utils.read_params import read_params
 
 app = FastAPI()
@@ -20,6 +16,10 @@ config = read_params()
 
 bucket = config["s3_bucket"]
 
+app_mode = environ.get("APP_MODE", config["app"]["mode"])
+
+import_utils = Import_Utils(config["app"]["startup_log"])
+
 templates = Jinja2Templates(directory=config["templates"]["dir"])
 
 origins = ["*"]
@@ -33,6 +33,13 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup():
+    import_utils.import_modules(config["app"]["serve_modules"])
+
+    import_utils.report_import_costs()
+
+
 @app.get("/")
 async def index(request: Request):
     return templates.TemplateResponse(
@@ -40,9 +47,15 @@ async def index(request: Request):
     )
 
 
-@app.get("/train")
 async def trainRouteClient():
     try:
+        from phising.model.load_production_model import Load_Prod_Model
+        from phising.model.training_model import Train_Model
+        from phising.validation_insertion.train_validation_insertion import (
+            Train_Validation,
+        )
+        from utils.main_utils import Main_Utils
+
         raw_data_train_bucket = bucket["phising_raw_data"]
 
         train_val = Train_Validation(raw_data_train_bucket)
@@ -53,13 +66,15 @@ async def trainRouteClient():
 
         num_clusters = train_model.training_model()
 
-        load_prod_model = Load_Prod_Model(num_clusters=num_clusters)
+        load_prod_model = Load_Prod_Model(
+            num_clusters=num_clusters, run_id=train_model.session_run_id
+        )
 
         load_prod_model.load_production_model()
 
         log = Main_Utils()
 
-        log.upload_logs("logs", config["s3_bucket"]["inputs_files"])
+        log.upload_logs()
 
     except Exception as e:
         return Response(f"Error Occurred : {e}")
@@ -67,9 +82,19 @@ async def trainRouteClient():
     return Response("Training successfull!!")
 
 
+if app_mode != "serve":
+    app.get("/train")(trainRouteClient)
+
+
 @app.get("/predict")
 async def predictRouteClient():
     try:
+        from phising.model.prediction_from_model import Prediction
+        from phising.validation_insertion.prediction_validation_insertion import (
+            Pred_Validation,
+        )
+        from utils.main_utils import Main_Utils
+
         raw_data_pred_bucket = bucket["phising_raw_data"]
 
         pred_val = Pred_Validation(raw_data_pred_bucket)
@@ -78,14 +103,14 @@ async def predictRouteClient():
 
         pred = Prediction()
 
-        bucket, fname, json_predictions = pred.predict_from_model()
+        pred_bucket, fname, json_predictions = pred.predict_from_model()
 
         log = Main_Utils()
 
-        log.upload_logs("logs", bucket["inputs_files"])
+        log.upload_logs()
 
         return Response(
-            f"Prediction file created in {bucket} bucket with fname as {fname}, and few of the predictions are {str(loads(json_predictions))}"
+            f"Prediction file created in {pred_bucket} bucket with fname as {fname}, and few of the predictions are {str(loads(json_predictions))}"
         )
 
     except Exception as e:
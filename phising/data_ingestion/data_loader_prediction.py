@@ -21,6 +21,8 @@ class Data_Getter_Pred:
 
         self.bucket = self.config["s3_bucket"]
 
+        self.na_values = self.config["missing_values"]["na_values"]
+
         self.s3 = S3_Operation()
 
         self.log_writer = App_Logger()
@@ -45,7 +47,10 @@ class Data_Getter_Pred:
 
         try:
             df = self.s3.read_csv(
-                self.pred_file, self.bucket["input_files"], self.log_file
+                self.pred_file,
+                self.bucket["input_files"],
+                self.log_file,
+                na_values=self.na_values,
             )
 
             self.log_writer.log("Data loaded for prediction", self.log_file)
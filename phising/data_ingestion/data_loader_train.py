@@ -21,6 +21,8 @@ class Data_Getter_Train:
 
         self.bucket = self.config["s3_bucket"]
 
+        self.na_values = self.config["missing_values"]["na_values"]
+
         self.s3 = S3_Operation()
 
         self.log_writer = App_Logger()
@@ -46,7 +48,10 @@ class Data_Getter_Train:
 
         try:
             df = self.s3.read_csv(
-                self.train_csv_file, self.bucket["input_files"], self.log_file
+                self.train_csv_file,
+                self.bucket["input_files"],
+                self.log_file,
+                na_values=self.na_values,
             )
 
             self.log_writer.log("Data loaded for training", self.log_file)
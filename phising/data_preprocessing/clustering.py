@@ -1,7 +1,11 @@
-from kneed import KneeLocator
-from matplotlib.pyplot import plot, savefig, title, xlabel, ylabel
+from hashlib import sha256
+from io import BytesIO
+
+from joblib import Parallel, delayed
+from numpy import ascontiguousarray, float64, unique
 from phising.s3_bucket_operations.s3_operations import S3_Operation
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.model_selection import train_test_split
 from utils.logger import App_Logger
 from utils.read_params import read_params
 
@@ -21,20 +25,36 @@ class KMeans_Clustering:
 
         self.input_files_bucket = self.config["s3_bucket"]["input_files"]
 
-        self.model_bucket = self.config["s3_bucket"]["wafer_model"]
+        self.model_bucket = self.config["s3_bucket"]["phising_model"]
 
         self.random_state = self.config["base"]["random_state"]
 
-        self.trained_model_dir = self.config["model_dir"]["trained"]
+        self.trained_model_dir = self.config["models_dir"]["trained"]
 
-        self.kmeans_params = self.config["KMeans"]
+        self.kmeans_params = {
+            "init": self.config["kmeans_cluster"]["init"],
+            "n_init": self.config["kmeans_cluster"]["n_init"],
+            "random_state": self.random_state,
+        }
 
         self.model_save_format = self.config["model_save_format"]
 
-        self.knee_params = self.config["knee"]
+        self.knee_params = self.config["kmeans_cluster"]["knee_locator"]
 
         self.max_clusters = self.config["kmeans_cluster"]["max_clusters"]
 
+        self.n_jobs = self.config["kmeans_cluster"]["n_jobs"]
+
+        self.backend = self.config["kmeans_cluster"]["backend"]
+
+        self.mini_batch_params = self.config["kmeans_cluster"]["mini_batch"]
+
+        self.sample_size = self.config["kmeans_cluster"]["sample_size"]
+
+        self.dedup_params = self.config["kmeans_cluster"]["dedup"]
+
+        self.elbow_cache_params = self.config["kmeans_cluster"]["elbow_cache"]
+
         self.elbow_plot = self.config["elbow_plot_fig"]
 
         self.s3 = S3_Operation()
@@ -43,12 +63,401 @@ class KMeans_Clustering:
 
         self.class_name = self.__class__.__name__
 
-    def draw_elbow_plot(self, data):
+    @staticmethod
+    def get_wcss(
+        n_clusters: int, data, sample_weight, model_cls, model_params: dict, init=None
+    ):
+        """
+        Method Name :   get_wcss
+        Description :   This method fits the clustering model with n_clusters on the data and returns the within cluster sum of squares.
+                        It is a static method so that it can be shipped to the joblib workers without the s3 clients.
+                        When init centroids are given, the model is warm started from them with a single init
+
+        Output      :   A tuple of inertia and centroids of the fitted clustering model
+        On Failure  :   Raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        if init is not None:
+            model_params = {**model_params, "init": init, "n_init": 1}
+
+        model = model_cls(n_clusters=n_clusters, **model_params)
+
+        model.fit(data, sample_weight=sample_weight)
+
+        return model.inertia_, model.cluster_centers_.tolist()
+
+    def get_cluster_model_params(self):
+        """
+        Method Name :   get_cluster_model_params
+        Description :   This method gets the clustering model class and its params based on the backend in params.yaml
+
+        Output      :   A tuple of clustering model class and params
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_cluster_model_params.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if self.backend == "mini_batch":
+                model_cls = MiniBatchKMeans
+
+                model_params = {**self.kmeans_params, **self.mini_batch_params}
+
+            elif self.backend in ("kmeans", "sampled"):
+                model_cls = KMeans
+
+                model_params = self.kmeans_params
+
+            else:
+                raise ValueError(f"{self.backend} is not a valid clustering backend")
+
+            self.log_writer.log(
+                f"Using {model_cls.__name__} for {self.backend} clustering backend",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return model_cls, model_params
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_cluster_sample(self, data, labels=None):
+        """
+        Method Name :   get_cluster_sample
+        Description :   This method gets the sample on which the clustering model is fitted. For sampled backend,
+                        a sample of sample_size rows is taken, stratified on labels when they are given
+
+        Output      :   The data to fit the clustering model on
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_cluster_sample.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if self.backend == "sampled" and len(data) > self.sample_size:
+                sample, _ = train_test_split(
+                    data,
+                    train_size=self.sample_size,
+                    stratify=labels,
+                    random_state=self.random_state,
+                )
+
+                self.log_writer.log(
+                    f"Took a sample of {len(sample)} rows from {len(data)} rows",
+                    self.log_file,
+                )
+
+            else:
+                sample = data
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return sample
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_unique_rows(self, data):
+        """
+        Method Name :   get_unique_rows
+        Description :   This method deduplicates the rows of the data. Since the features are ternary, the training data
+                        has many duplicate rows, and every unique row is weighted with the number of times it occurs
+
+        Output      :   A tuple of unique rows and the count of every unique row
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_unique_rows.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            unique_rows, counts = unique(data, axis=0, return_counts=True)
+
+            self.log_writer.log(
+                f"Deduplicated {len(data)} rows to {len(unique_rows)} unique rows",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return unique_rows, counts
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_data_fingerprint(self, matrix, columns: list):
+        """
+        Method Name :   get_data_fingerprint
+        Description :   This method fingerprints the training matrix by hash, row count, schema version and the
+                        clustering params, so that the elbow results can be reused for the same training data
+
+        Output      :   A dictionary with the fingerprint of the training matrix
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_data_fingerprint.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            fingerprint = {
+                "hash": sha256(matrix.tobytes()).hexdigest(),
+                "rows": matrix.shape[0],
+                "columns": [str(col) for col in columns],
+                "schema_version": self.elbow_cache_params["schema_version"],
+                "params": {
+                    "backend": self.backend,
+                    "max_clusters": self.max_clusters,
+                    "sample_size": self.sample_size,
+                    "init": self.kmeans_params["init"],
+                    "n_init": self.kmeans_params["n_init"],
+                    "random_state": self.random_state,
+                    "dedup": self.dedup_params,
+                },
+            }
+
+            self.log_writer.log(
+                f"Got fingerprint of training data as {fingerprint['hash']} with {fingerprint['rows']} rows",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return fingerprint
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_elbow_cache(self):
+        """
+        Method Name :   get_elbow_cache
+        Description :   This method gets the persisted elbow results from the input files bucket
+
+        Output      :   A dictionary with fingerprint, wcss curve, centroids and knee, or None if nothing is persisted
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_elbow_cache.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            cache_file = self.elbow_cache_params["file"]
+
+            if self.s3.object_exists(cache_file, self.input_files_bucket, self.log_file):
+                cache = self.s3.read_json(
+                    cache_file, self.input_files_bucket, self.log_file
+                )
+
+                self.log_writer.log(f"Got elbow cache from {cache_file}", self.log_file)
+
+            else:
+                cache = None
+
+                self.log_writer.log("No elbow cache is present", self.log_file)
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return cache
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_warm_start_centroids(self, matrix, fingerprint: dict, cache: dict):
+        """
+        Method Name :   get_warm_start_centroids
+        Description :   This method checks whether the training data is the cached training data with rows appended to it.
+                        If so and warm start is enabled, the cached centroids are returned to warm start the sweep
+
+        Output      :   A dictionary of number of clusters to centroids, or None if the sweep cannot be warm started
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_warm_start_centroids.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            centroids = None
+
+            if self.elbow_cache_params["warm_start"] is True and cache is not None:
+                prev = cache["fingerprint"]
+
+                is_appended = (
+                    prev["columns"] == fingerprint["columns"]
+                    and prev["schema_version"] == fingerprint["schema_version"]
+                    and prev["params"] == fingerprint["params"]
+                    and prev["rows"] < fingerprint["rows"]
+                    and sha256(matrix[: prev["rows"]].tobytes()).hexdigest()
+                    == prev["hash"]
+                )
+
+                if is_appended:
+                    centroids = cache["centroids"]
+
+                    self.log_writer.log(
+                        f"Training data has {fingerprint['rows'] - prev['rows']} appended rows, warm starting the sweep",
+                        self.log_file,
+                    )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return centroids
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_wcss_curve(self, data, labels, init_centroids=None, dedup: bool = True):
+        """
+        Method Name :   get_wcss_curve
+        Description :   This method fits the clustering model for every number of clusters in parallel. With dedup, the
+                        models are fitted on the unique rows weighted by their counts, which has the same objective as
+                        the full data, but k-means++ seeding ignores the weights in sklearn 0.24 and draws from the
+                        unique rows, so the seeds and the local optima found can differ from a fit on the full data
+
+        Output      :   A tuple of cluster range, wcss curve and centroids for every number of clusters
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_wcss_curve.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            model_cls, model_params = self.get_cluster_model_params()
+
+            sample = self.get_cluster_sample(data, labels)
+
+            if dedup:
+                unique_rows, counts = self.get_unique_rows(sample)
+
+            else:
+                unique_rows, counts = ascontiguousarray(sample, dtype=float64), None
+
+            cluster_range = range(1, min(self.max_clusters, len(unique_rows) + 1))
+
+            init_centroids = init_centroids or {}
+
+            results = Parallel(n_jobs=self.n_jobs)(
+                delayed(self.get_wcss)(
+                    i,
+                    unique_rows,
+                    counts,
+                    model_cls,
+                    model_params,
+                    init=init_centroids.get(str(i)),
+                )
+                for i in cluster_range
+            )
+
+            wcss = [inertia for inertia, _ in results]
+
+            centroids = {str(i): res[1] for i, res in zip(cluster_range, results)}
+
+            self.log_writer.log(
+                f"Computed wcss for {len(cluster_range)} clusters on {len(unique_rows)} rows with n_jobs as {self.n_jobs}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return list(cluster_range), wcss, centroids
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_knee(self, cluster_range: list, wcss: list):
+        """
+        Method Name :   get_knee
+        Description :   This method locates the knee of the wcss curve with the knee locator params
+
+        Output      :   The number of clusters at the knee, or None when there is no knee
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_knee.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            from kneed import KneeLocator
+
+            knee = KneeLocator(cluster_range, wcss, **self.knee_params).knee
+
+            knee = int(knee) if knee is not None else knee
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return knee
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def draw_elbow_plot(self, data, labels=None):
         """
         Method Name :   draw_elbow_plot
-        Description :   This method saves the plot to s3 bucket and decides the optimum number of clusters to the file.
+        Description :   This method decides the optimum number of clusters based on the elbow method.
+                        The sweep is done with the clustering backend mentioned in params.yaml, and the wcss curve
+                        is kept so that the plot can be saved after training with save_elbow_plot
         
-        Output      :   An elbow plot figure saved to input files bucket
+        Output      :   The optimum number of clusters
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -59,59 +468,153 @@ class KMeans_Clustering:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            wcss = []
+            matrix = ascontiguousarray(data, dtype=float64)
+
+            fingerprint = self.get_data_fingerprint(matrix, data.columns)
+
+            cache = self.get_elbow_cache()
+
+            if cache is not None and cache["fingerprint"] == fingerprint:
+                cluster_range, wcss = cache["cluster_range"], cache["wcss"]
+
+                knee = cache["knee"]
+
+                self.log_writer.log(
+                    "Training data is unchanged, reused the cached elbow results",
+                    self.log_file,
+                )
+
+            else:
+                init_centroids = self.get_warm_start_centroids(
+                    matrix, fingerprint, cache
+                )
+
+                cluster_range, wcss, centroids = self.get_wcss_curve(
+                    data,
+                    labels,
+                    init_centroids=init_centroids,
+                    dedup=self.dedup_params["enabled"],
+                )
+
+                knee = self.get_knee(cluster_range, wcss)
 
-            for i in range(1, self.max_clusters):
-                kmeans = KMeans(n_clusters=i, **self.kmeans_params)
+                ## The deduplicated sweep can find a different knee, since the seeding of the weighted fit
+                ## differs, so with verify_knee the full data sweep is run as well and its results are kept
+                ## when the knees differ
 
-                kmeans.fit(data)
+                if self.dedup_params["enabled"] and self.dedup_params["verify_knee"]:
+                    full_curve = self.get_wcss_curve(
+                        data, labels, init_centroids=init_centroids, dedup=False
+                    )
 
-                wcss.append(kmeans.inertia_)
+                    full_knee = self.get_knee(full_curve[0], full_curve[1])
 
-            plot(range(1, self.max_clusters), wcss)
+                    self.log_writer.log(
+                        f"Knee of deduplicated sweep is {knee}, knee of full data sweep is {full_knee}",
+                        self.log_file,
+                    )
 
-            title("The Elbow Method")
+                    if full_knee != knee:
+                        cluster_range, wcss, centroids = full_curve
 
-            xlabel("Number of clusters")
+                        knee = full_knee
 
-            ylabel("WCSS")
+                self.s3.upload_json(
+                    {
+                        "fingerprint": fingerprint,
+                        "cluster_range": cluster_range,
+                        "wcss": wcss,
+                        "centroids": centroids,
+                        "knee": knee,
+                    },
+                    self.elbow_cache_params["file"],
+                    self.input_files_bucket,
+                    self.log_file,
+                )
 
-            savefig(self.elbow_plot)
+                self.log_writer.log("Persisted the elbow results", self.log_file)
+
+            self.cluster_range, self.wcss = cluster_range, wcss
 
             self.log_writer.log(
-                "Saved elbow plot fig and local copy is created", self.log_file
+                f"The optimum number of clusters is {str(knee)}", self.log_file
             )
 
-            self.s3.upload_file(
-                self.elbow_plot,
-                self.elbow_plot,
-                self.input_files_bucket,
-                self.log_file,
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
             )
 
-            self.kn = KneeLocator(range(1, self.max_clusters), wcss, **self.knee_params)
+            return knee
 
-            self.log_writer.log(
-                f"The optimum number of clusters is {str(self.kn.knee)}", self.log_file
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def save_elbow_plot(self):
+        """
+        Method Name :   save_elbow_plot
+        Description :   This method renders the elbow plot of the last sweep with a non interactive backend in memory,
+                        and uploads it to input files bucket. Matplotlib is only imported here, so that it is not
+                        loaded in the prediction process
+
+        Output      :   An elbow plot figure saved to input files bucket
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.save_elbow_plot.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            from matplotlib import use
+
+            use("Agg")
+
+            from matplotlib.pyplot import close, subplots
+
+            fig, ax = subplots()
+
+            try:
+                ax.plot(self.cluster_range, self.wcss)
+
+                ax.set_title("The Elbow Method")
+
+                ax.set_xlabel("Number of clusters")
+
+                ax.set_ylabel("WCSS")
+
+                buf = BytesIO()
+
+                fig.savefig(buf, format="png")
+
+            finally:
+                close(fig)
+
+            self.log_writer.log("Rendered elbow plot in memory", self.log_file)
+
+            self.s3.upload_object(
+                buf.getvalue(), self.elbow_plot, self.input_files_bucket, self.log_file
             )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
             )
 
-            return self.kn.knee
-
         except Exception as e:
             self.log_writer.exception_log(
                 e, self.class_name, method_name, self.log_file
             )
 
-    def create_clusters(self, data, num_clusters: int):
+    def create_clusters(self, data, num_clusters: int, labels=None):
         """
         Method Name :   create_clusters
-        Description :   Create a new dataframe consisting of the cluster information.
+        Description :   Create a new dataframe consisting of the cluster information. The clustering model is fitted
+                        with the backend mentioned in params.yaml and every row is assigned in a single predict call
         
-        Output      :   A dataframe with cluster column
+        Output      :   A dataframe with cluster column, inertia of the clustering model on the data is logged
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -122,9 +625,22 @@ class KMeans_Clustering:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            self.kmeans = KMeans(n_clusters=num_clusters, **self.kmeans_params)
+            model_cls, model_params = self.get_cluster_model_params()
 
-            self.y_kmeans = self.kmeans.fit_predict(data)
+            sample = self.get_cluster_sample(data, labels)
+
+            self.kmeans = model_cls(n_clusters=num_clusters, **model_params)
+
+            self.kmeans.fit(sample)
+
+            self.y_kmeans = self.kmeans.predict(data)
+
+            self.inertia = -self.kmeans.score(data)
+
+            self.log_writer.log(
+                f"Inertia of {model_cls.__name__} with {self.backend} backend is {self.inertia}",
+                self.log_file,
+            )
 
             self.s3.save_model(
                 self.kmeans, self.trained_model_dir, self.model_bucket, self.log_file
@@ -133,7 +649,7 @@ class KMeans_Clustering:
             data["Cluster"] = self.y_kmeans
 
             self.log_writer.log(
-                f"Successfully created {str(self.kn.knee)} clusters", self.log_file
+                f"Successfully created {num_clusters} clusters", self.log_file
             )
 
             self.log_writer.start_log(
@@ -1,9 +1,9 @@
-import numpy as np
-from numpy import NaN, nan
+from concurrent.futures import ThreadPoolExecutor
+
+from numpy import float64, isnan, where
 from pandas import DataFrame, to_numeric
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
-from utils.model_utils import Model_Utils
 from utils.read_params import read_params
 
 
@@ -25,14 +25,26 @@ class Preprocessor:
 
         self.log_file = log_file
 
-        self.model_utils = Model_Utils()
-
         self.null_values_file = self.config["null_values_csv_file"]
 
-        self.n_components = self.config["pca_model"]["n_components"]
+        self.na_values = self.config["missing_values"]["na_values"]
+
+        self.null_report_params = self.config["null_values_report"]
+
+        self.null_report_future = None
+
+        self.executor = ThreadPoolExecutor(max_workers=1)
 
         self.input_files_bucket = self.config["s3_bucket"]["input_files"]
 
+        self.model_bucket = self.config["s3_bucket"]["phising_model"]
+
+        self.trained_model_dir = self.config["models_dir"]["trained"]
+
+        self.imputer_params = self.config["imputer"]
+
+        self.knn_imputer_params = self.config["knn_imputer"]
+
         self.s3 = S3_Operation()
 
     def separate_label_feature(self, data, label_col_name: str):
@@ -74,9 +86,9 @@ class Preprocessor:
     def replace_invalid_values(self, data):
         """
         Method Name :   replace_invalid_values
-        Description :   This method replaces invalid values i.e. 'na' with nan
+        Description :   This method replaces invalid values i.e. the missing value tokens like '?' and 'na' with nan
 
-        Output      :   Replaces the invalid values like "'na'" with nan, so that imputation can be done
+        Output      :   Replaces every missing value token in na_values with nan in a single isin over the dataframe, so that imputation can be done
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -88,9 +100,9 @@ class Preprocessor:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            data.replace(to_replace="'na'", value=nan, inplace=True)
+            data = data.mask(data.isin(self.na_values))
 
-            self.log_writer.log("Replaced " "na" " with nan", self.log_file)
+            self.log_writer.log(f"Replaced {self.na_values} with nan", self.log_file)
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -103,12 +115,126 @@ class Preprocessor:
                 e, self.class_name, method_name, self.log_file
             )
 
+    def profile_null_values(self, data):
+        """
+        Method Name :   profile_null_values
+        Description :   This method profiles the null values of every column in a single pass over the dataframe.
+                        A column is marked to be dropped when its null ratio is not less than max_null_ratio
+
+        Output      :   A dataframe with columns, missing values count, missing values ratio and drop mask
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.profile_null_values.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            null_counts = data.isna().to_numpy().sum(axis=0)
+
+            null_ratios = null_counts / max(len(data), 1)
+
+            null_profile = DataFrame(
+                {
+                    "columns": data.columns,
+                    "missing values count": null_counts,
+                    "missing values ratio": null_ratios,
+                    "drop": null_ratios >= self.imputer_params["max_null_ratio"],
+                }
+            )
+
+            self.log_writer.log(
+                f"Null values count is : {dict(zip(data.columns, null_counts))}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return null_profile
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def upload_null_report(self, null_profile):
+        """
+        Method Name :   upload_null_report
+        Description :   This method uploads the null values report to input files bucket from memory
+
+        Output      :   A csv file with null values report is uploaded to input files bucket
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.upload_null_report.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            self.s3.upload_object(
+                null_profile.to_csv(index=None, header=True).encode(),
+                self.null_values_file,
+                self.input_files_bucket,
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def wait_for_null_report(self):
+        """
+        Method Name :   wait_for_null_report
+        Description :   This method waits for the asynchronous upload of null values report to complete
+
+        Output      :   The null values report upload is completed, the upload error is raised if any
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.wait_for_null_report.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if self.null_report_future is not None:
+                self.null_report_future.result()
+
+                self.null_report_future = None
+
+                self.log_writer.log("Null values report is uploaded", self.log_file)
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
     def is_null_present(self, data):
         """
         Method Name :   is_null_present
         Description :   This method checks whether there are null values present in the pandas Dataframe or not.
         
-        Output      :   If null values are present in the dataframe, a csv file is created and then uploaded back to input files bucket
+        Output      :   If null values are present in the dataframe, a csv file is created and then uploaded back to input files bucket.
+                        The upload is done in background when async is set for null values report
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
@@ -120,69 +246,129 @@ class Preprocessor:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            null_present = False
+            self.null_profile = self.profile_null_values(data)
+
+            null_present = bool(self.null_profile["missing values count"].any())
 
-            cols_with_missing_values = []
+            if null_present is True and self.null_report_params["upload"] is True:
+                self.log_writer.log(
+                    "Null values were found the columns...uploading null values report",
+                    self.log_file,
+                )
 
-            cols = data.columns
+                if self.null_report_params["async"] is True:
+                    self.null_report_future = self.executor.submit(
+                        self.upload_null_report, self.null_profile
+                    )
 
-            self.null_counts = data.isna().sum()
+                else:
+                    self.upload_null_report(self.null_profile)
 
-            self.log_writer.log(
-                f"Null values count is : {self.null_counts}", self.log_file
+            else:
+                self.log_writer.log(
+                    "Skipped the upload of null values report", self.log_file,
+                )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
             )
 
-            for i in range(len(self.null_counts)):
-                if self.null_counts[i] > 0:
-                    null_present = True
+            return null_present
 
-                    cols_with_missing_values.append(cols[i])
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
 
-            self.log_writer.log("Created cols with missing values", self.log_file)
+    def fit_imputer(self, data, null_profile=None):
+        """
+        Method Name :   fit_imputer
+        Description :   This method fits the imputer on the training data. The columns whose null ratio is less than
+                        max_null_ratio are kept, and their fill statistics are computed in one vectorized pass, or a
+                        KNNImputer is fitted when the backend is knn. The imputer is saved alongside the models
 
-            if null_present is True:
-                self.log_writer.log(
-                    "Null values were found the columns...preparing dataframe with null values",
-                    self.log_file,
-                )
+        Output      :   A dictionary with backend, columns, statistics and the fitted imputer
+        On Failure  :   Write an exception log and then raise an exception
 
-                self.null_df = DataFrame()
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.fit_imputer.__name__
 
-                self.null_df["columns"] = data.columns
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
-                self.null_df["missing values count"] = np.asarray(data.isna().sum())
+        try:
+            backend = self.imputer_params["backend"]
 
-                self.log_writer.log("Created dataframe with null values", self.log_file)
+            if null_profile is None:
+                null_profile = self.profile_null_values(data)
 
-                self.s3.upload_df_as_csv(
-                    self.null_df,
-                    self.null_values_file,
-                    self.null_values_file,
-                    self.input_files_bucket,
-                    self.log_file,
+            cols = data.columns[~null_profile["drop"].to_numpy()]
+
+            self.log_writer.log(
+                f"Got {len(cols)} columns whose null ratio is less than {self.imputer_params['max_null_ratio']}",
+                self.log_file,
+            )
+
+            X = data[cols].apply(to_numeric, errors="coerce").to_numpy(dtype=float64)
+
+            if backend == "knn":
+                from sklearn.impute import KNNImputer
+
+                imputer = KNNImputer(**self.knn_imputer_params)
+
+                imputer.fit(X)
+
+                statistics = None
+
+            elif backend == "simple":
+                from sklearn.impute import SimpleImputer
+
+                imputer = None
+
+                statistics = (
+                    SimpleImputer(strategy=self.imputer_params["strategy"])
+                    .fit(X)
+                    .statistics_
                 )
 
             else:
-                self.log_writer.log(
-                    "No null values are present in cols. Skipped the creation of dataframe",
-                    self.log_file,
-                )
+                raise ValueError(f"{backend} is not a valid imputer backend")
+
+            self.imputer = {
+                "backend": backend,
+                "columns": list(cols),
+                "statistics": statistics,
+                "imputer": imputer,
+            }
+
+            self.log_writer.log(f"Fitted imputer with {backend} backend", self.log_file)
+
+            self.s3.save_model(
+                self.imputer,
+                self.trained_model_dir,
+                self.model_bucket,
+                self.log_file,
+                model_name=self.imputer_params["model_name"],
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
             )
 
-            return null_present
+            return self.imputer
 
         except Exception as e:
             self.log_writer.exception_log(
                 e, self.class_name, method_name, self.log_file
             )
 
-    def impute_missing_values(self, data):
+    def impute_missing_values(self, data, imputer: dict = None):
         """
         Method Name :   impute_missing_values
-        Description :   This method replaces all the missing values in the dataframe using mean values of the column.
+        Description :   This method replaces all the missing values in the dataframe using the fill statistics of the fitted imputer.
+                        Only the columns which were kept during fitting are returned
         
         Output      :   A dataframe which has all the missing values are imputed.
         On Failure  :   Write an exception log and then raise an exception
@@ -196,20 +382,27 @@ class Preprocessor:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            data = data[data.columns[data.isnull().mean() < 0.6]]
+            imputer = self.imputer if imputer is None else imputer
 
-            self.log_writer.log(
-                "Got the data whose mena is less than 0.6", self.log_file
-            )
+            cols = imputer["columns"]
 
-            data = data.apply(to_numeric())
+            X = data[cols].apply(to_numeric, errors="coerce").to_numpy(dtype=float64)
 
             self.log_writer.log(
                 "Applied to_numeric function on dataframe", self.log_file
             )
 
-            for col in data.columns:
-                data[col] = data[col].replace(NaN, data[col].mean())
+            if imputer["backend"] == "knn":
+                X = imputer["imputer"].transform(X)
+
+            else:
+                X = where(isnan(X), imputer["statistics"], X)
+
+            data = DataFrame(X, columns=cols, index=data.index)
+
+            self.log_writer.log(
+                f"Imputed missing values with {imputer['backend']} imputer", self.log_file
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -2,6 +2,7 @@ from phising.mongo_db_operations.mongo_operations import MongoDB_Operation
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
 from utils.read_params import read_params
+from utils.schema_utils import Schema_Utils
 
 
 class DB_Operation_Pred:
@@ -24,8 +25,12 @@ class DB_Operation_Pred:
 
         self.good_data_pred_dir = self.config["data"]["pred"]["good"]
 
+        self.bad_data_pred_dir = self.config["data"]["pred"]["bad"]
+
         self.input_files_bucket = self.config["s3_bucket"]["input_files"]
 
+        self.na_values = self.config["missing_values"]["na_values"]
+
         self.pred_db_insert_log = self.config["pred_db_log"]["db_insert"]
 
         self.pred_export_csv_log = self.config["pred_db_log"]["export_csv"]
@@ -37,11 +42,15 @@ class DB_Operation_Pred:
         self.log_writer = App_Logger()
 
     def insert_good_data_as_record(
-        self, good_data_db_name: str, good_data_collection_name: str
+        self,
+        good_data_db_name: str,
+        good_data_collection_name: str,
+        column_names: dict = None,
     ):
         """
         Method Name :   insert_good_data_as_record
-        Description :   This method inserts the good data in MongoDB as collection
+        Description :   This method inserts the good data in MongoDB as collection. When column names are given, the files
+                        are parsed as typed dataframes with the read_csv kwargs built from schema
 
         Output      :   A MongoDB collection is created with good data present in it
         On Failure  :   Write an exception log and then raise an exception
@@ -57,14 +66,23 @@ class DB_Operation_Pred:
         )
 
         try:
-            lst = self.s3.read_csv_from_folder(
-                self.good_data_pred_dir, self.pred_data_bucket, self.pred_db_insert_log,
-            )
+            if column_names is None:
+                lst = self.s3.read_csv_from_folder(
+                    self.good_data_pred_dir,
+                    self.pred_data_bucket,
+                    self.pred_db_insert_log,
+                    na_values=self.na_values,
+                )
 
-            for idx, f in enumerate(lst):
-                df = f[idx][0]
+            else:
+                lst = Schema_Utils(self.pred_db_insert_log).read_csv_from_folder(
+                    self.good_data_pred_dir,
+                    self.pred_data_bucket,
+                    column_names,
+                    bad_dir=self.bad_data_pred_dir,
+                )
 
-                file = f[idx][1]
+            for df, file, _ in lst:
 
                 if file.endswith(".csv"):
                     self.mongo.insert_dataframe_as_record(
@@ -1,14 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
 from os import environ
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import BoundedSemaphore, Lock
+from time import time
 
 from mlflow import (
+    active_run,
     get_experiment_by_name,
-    log_metric,
-    log_param,
+    register_model,
     search_runs,
     set_experiment,
     set_tracking_uri,
 )
-from mlflow.sklearn import log_model
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.sklearn import save_model
 from mlflow.tracking import MlflowClient
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
@@ -17,12 +23,19 @@ from utils.read_params import read_params
 
 class MLFlow_Operation:
     """
-    Description :    This class shall be used for handling all the mlflow operations
+    Description :    This class shall be used for handling all the mlflow operations. The tracking uri and the
+                     experiment are set once per session, and the params, metrics and tags of a run are accumulated
+                     and logged with a single batch call. The model artifacts are uploaded and registered by a
+                     background worker, and wait_for_model_logs is the barrier for them
 
     Version     :   1.2
     Revisions   :   Moved to setup to cloud 
     """
 
+    session = None
+
+    session_lock = Lock()
+
     def __init__(self, log_file):
         self.config = read_params()
 
@@ -42,10 +55,28 @@ class MLFlow_Operation:
 
         self.prod_models_dir = self.config["models_dir"]["prod"]
 
-        self.model_save_format = self.config["model_utils"]["save_format"]
+        self.model_save_format = self.config["model_save_format"]
 
         self.remote_server_uri = environ["MLFLOW_TRACKING_URI"]
 
+        self.client = None
+
+        self.experiment_id = None
+
+        self.run_batches = {}
+
+        self.async_logging = self.config["mlflow_config"]["async_logging"]
+
+        self.pending_slots = BoundedSemaphore(
+            self.config["mlflow_config"]["max_pending_logs"]
+        )
+
+        self.pending_futures = []
+
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.max_workers = self.config["mlflow_config"]["max_workers"]
+
     def get_experiment_from_mlflow(self, exp_name: str):
         """
         Method Name :   get_experiment_from_mlflow
@@ -78,12 +109,13 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def get_runs_from_mlflow(self, exp_id: int):
+    def get_runs_from_mlflow(self, exp_id: int, session_run_id: str = None):
         """
         Method Name :   get_runs_from_mlflow
-        Description :   This method gets the runs from the mlflow server for a particular experiment id
+        Description :   This method gets the runs from the mlflow server for a particular experiment id. When session
+                        run id is given, only the cluster runs nested in that session run are searched
 
-        Output      :   A pandas series object consisting of runs for the particular experiment id
+        Output      :   A pandas dataframe object consisting of runs for the particular experiment id
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -95,7 +127,14 @@ class MLFlow_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            runs = search_runs(experiment_ids=exp_id)
+            if session_run_id is None:
+                runs = search_runs(experiment_ids=exp_id)
+
+            else:
+                runs = search_runs(
+                    experiment_ids=exp_id,
+                    filter_string=f"tags.`mlflow.parentRunId` = '{session_run_id}'",
+                )
 
             self.log_writer.log(
                 f"Completed searching for runs in mlflow with experiment ids as {exp_id}",
@@ -113,6 +152,50 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
+    def get_latest_session_run_id(self, exp_id: int):
+        """
+        Method Name :   get_latest_session_run_id
+        Description :   This method gets the run id of the latest training session run for a particular experiment id
+
+        Output      :   The run id of the latest session run is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_latest_session_run_id.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            runs = search_runs(
+                experiment_ids=exp_id,
+                filter_string="tags.run_type = 'session'",
+                order_by=["attributes.start_time DESC"],
+                max_results=1,
+            )
+
+            if len(runs) == 0:
+                raise Exception(f"No training session run found in {exp_id} experiment")
+
+            session_run_id = runs["run_id"].iloc[0]
+
+            self.log_writer.log(
+                f"Got {session_run_id} as the latest session run", self.log_file
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return session_run_id
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
     def set_mlflow_experiment(self, experiment_name: str):
         """
         Method Name :   set_mlflow_experiment
@@ -148,7 +231,8 @@ class MLFlow_Operation:
     def get_mlflow_client(self):
         """
         Method Name :   get_mlflow_client
-        Description :   This method gets mlflow client for the particular server uri
+        Description :   This method gets mlflow client for the particular server uri, the client is created once and
+                        reused by the instance
 
         Output      :   A mlflow client is created with particular server uri
         On Failure  :   Write an exception log and then raise an exception
@@ -162,7 +246,8 @@ class MLFlow_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            client = MlflowClient(self.remote_server_uri)
+            if self.client is None:
+                self.client = MlflowClient(self.remote_server_uri)
 
             self.log_writer.log("Got mlflow client with tracking uri", self.log_file)
 
@@ -170,7 +255,7 @@ class MLFlow_Operation:
                 "exit", self.class_name, method_name, self.log_file
             )
 
-            return client
+            return self.client
 
         except Exception as e:
             self.log_writer.exception_log(
@@ -196,7 +281,7 @@ class MLFlow_Operation:
         try:
             set_tracking_uri(self.remote_server_uri)
 
-            self.log_writer.log(self.log_file, "Set mlflow tracking uri")
+            self.log_writer.log("Set mlflow tracking uri", self.log_file)
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -207,6 +292,70 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
+    def start_mlflow_session(self, experiment_name: str):
+        """
+        Method Name :   start_mlflow_session
+        Description :   This method sets the mlflow tracking uri and experiment once per session. When the session
+                        is already set for the tracking uri and experiment, the experiment id is reused without any
+                        call to the mlflow server
+
+        Output      :   The experiment id of the session is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.start_mlflow_session.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            with self.session_lock:
+                session = MLFlow_Operation.session
+
+                if session is None or session[:2] != (
+                    self.remote_server_uri,
+                    experiment_name,
+                ):
+                    self.set_mlflow_tracking_uri()
+
+                    self.set_mlflow_experiment(experiment_name)
+
+                    exp = get_experiment_by_name(experiment_name)
+
+                    session = (
+                        self.remote_server_uri,
+                        experiment_name,
+                        exp.experiment_id,
+                    )
+
+                    MLFlow_Operation.session = session
+
+                    self.log_writer.log(
+                        f"Started mlflow session with {experiment_name} experiment",
+                        self.log_file,
+                    )
+
+                else:
+                    self.log_writer.log(
+                        f"Reused mlflow session with {experiment_name} experiment",
+                        self.log_file,
+                    )
+
+            self.experiment_id = session[2]
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return self.experiment_id
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
     def get_mlflow_models(self):
         """
         Method Name :   get_mlflow_models
@@ -244,7 +393,8 @@ class MLFlow_Operation:
     def search_mlflow_models(self, order: str):
         """
         Method Name :   search_mlflow_models
-        Description :   This method searches for registered models and returns them in the mentioned order
+        Description :   This method searches for registered models and returns them in the mentioned order, all the
+                        pages of the search are read
 
         Output      :   A list of registered models in the mentioned order
         On Failure  :   Write an exception log and then raise an exception
@@ -260,7 +410,22 @@ class MLFlow_Operation:
         try:
             client = self.get_mlflow_client()
 
-            results = client.search_registered_models(order_by=[f"name {order}"])
+            results, page_token = [], None
+
+            ## The registry returns at most max_results models per page, the pages are followed with the
+            ## page token until the last page
+
+            while True:
+                page = client.search_registered_models(
+                    order_by=[f"name {order}"], page_token=page_token
+                )
+
+                results.extend(page)
+
+                page_token = page.token
+
+                if not page_token:
+                    break
 
             self.log_writer.log(
                 f"Got registered models in mlflow in {order} order", self.log_file
@@ -277,10 +442,150 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def log_sklearn_model(self, model, model_name: str):
+    def upload_sklearn_model(self, model, model_name: str, run_id: str):
+        """
+        Method Name :   upload_sklearn_model
+        Description :   This method serializes the model, uploads it as an artifact of the run and registers a new
+                        version of the model in mlflow server
+
+        Output      :   A model is logged to the run and registered in mlflow server
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.upload_sklearn_model.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            with TemporaryDirectory() as tmp_dir:
+                model_path = join(tmp_dir, model_name)
+
+                save_model(
+                    sk_model=model,
+                    path=model_path,
+                    serialization_format=self.mlflow_save_format,
+                )
+
+                client = self.get_mlflow_client()
+
+                client.log_artifacts(run_id, model_path, artifact_path=model_name)
+
+            self.log_writer.log(
+                f"Uploaded {model_name} model to {run_id} run", self.log_file
+            )
+
+            register_model(f"runs:/{run_id}/{model_name}", model_name)
+
+            self.log_writer.log(f"Registered {model_name} model in mlflow", self.log_file)
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def submit_model_log(self, func, *args):
+        """
+        Method Name :   submit_model_log
+        Description :   This method runs the model logging function in the background worker when async logging is
+                        set, else it is run in place. At most max_pending_logs functions are pending, when the limit
+                        is reached this method blocks until a pending one is completed
+
+        Output      :   The model logging function is submitted to the background worker
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.submit_model_log.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if self.async_logging is True:
+                self.pending_slots.acquire()
+
+                try:
+                    future = self.executor.submit(func, *args)
+
+                except Exception as e:
+                    self.pending_slots.release()
+
+                    raise e
+
+                future.add_done_callback(lambda _: self.pending_slots.release())
+
+                self.pending_futures.append(future)
+
+                self.log_writer.log(
+                    f"Submitted {func.__name__} to the background worker", self.log_file
+                )
+
+            else:
+                func(*args)
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def wait_for_model_logs(self):
+        """
+        Method Name :   wait_for_model_logs
+        Description :   This method waits for all the model logs submitted to the background worker to complete
+
+        Output      :   The model logs are completed, and an exception is raised when any of them has failed
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.wait_for_model_logs.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            futures, self.pending_futures = self.pending_futures, []
+
+            errors = [f.exception() for f in futures]
+
+            errors = [e for e in errors if e is not None]
+
+            if len(errors) > 0:
+                raise Exception(
+                    f"{len(errors)} of {len(futures)} model logs failed, first error : {errors[0]}"
+                )
+
+            self.log_writer.log(
+                f"Completed {len(futures)} model logs in mlflow", self.log_file
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def log_sklearn_model(self, model, model_name: str, run_id: str = None):
         """
         Method Name :   log_sklearn_model
-        Description :   This method logs the model to mlflow server
+        Description :   This method logs the model to the run in mlflow server and registers it. The upload and the
+                        registration are done by the background worker when async logging is set
 
         Output      :   A model is logged to the mlflow server
         On Failure  :   Write an exception log and then raise an exception
@@ -294,12 +599,10 @@ class MLFlow_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            log_model(
-                sk_model=model,
-                serialization_format=self.mlflow_save_format,
-                registered_model_name=model_name,
-                artifact_path=model_name,
-            )
+            if run_id is None:
+                run_id = active_run().info.run_id
+
+            self.submit_model_log(self.upload_sklearn_model, model, model_name, run_id)
 
             self.log_writer.log(f"Logged {model_name} model in mlflow", self.log_file)
 
@@ -312,29 +615,39 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def log_model_metric(self, model_name: str, metric: float):
+    def add_to_run_batch(
+        self, run_id: str, metrics: list = None, params: list = None, tags: list = None
+    ):
         """
-        Method Name :   log_model_metric
-        Description :   This method logs the model metric to mlflow server
+        Method Name :   add_to_run_batch
+        Description :   This method adds the metrics, params and tags to the pending batch of the run, nothing is
+                        sent to the mlflow server until the batch is flushed
 
-        Output      :   A model metric is logged to mlflow server
+        Output      :   The metrics, params and tags are added to the batch of the run
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         
         Revisions   :   moved setup to cloud
         """
-        method_name = self.log_model_metric.__name__
+        method_name = self.add_to_run_batch.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            model_score_name = f"{model_name}-best_score"
+            batch = self.run_batches.setdefault(
+                run_id, {"metrics": [], "params": [], "tags": []}
+            )
 
-            log_metric(model_score_name, metric)
+            batch["metrics"].extend(metrics or [])
+
+            batch["params"].extend(params or [])
+
+            batch["tags"].extend(tags or [])
 
             self.log_writer.log(
-                self.log_file, f"{model_score_name} logged in mlflow",
+                f"Added {len(metrics or [])} metrics, {len(params or [])} params and {len(tags or [])} tags to the batch of {run_id} run",
+                self.log_file,
             )
 
             self.log_writer.start_log(
@@ -346,28 +659,47 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def log_model_param(self, idx: int, model, model_name: str, param: str):
+    def flush_run_batch(self, run_id: str = None):
         """
-        Method Name :   log_model_param
-        Description :   This method logs the model param to mlflow server
+        Method Name :   flush_run_batch
+        Description :   This method logs the pending metrics, params and tags of the run to mlflow server with a
+                        single batch call. When run id is not given, the active run is flushed
 
-        Output      :   A model param is logged to mlflow server
+        Output      :   The pending batch of the run is logged to mlflow server
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         
         Revisions   :   moved setup to cloud
         """
-        method_name = self.log_model_param.__name__
+        method_name = self.flush_run_batch.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            model_param_name = model_name + str(idx) + f"-{param}"
+            if run_id is None:
+                run_id = active_run().info.run_id
+
+            batch = self.run_batches.pop(run_id, None)
 
-            log_param(model_param_name, model.__dict__[param])
+            if batch is not None:
+                client = self.get_mlflow_client()
 
-            self.log_writer.log(f"{model_param_name} logged in mlflow", self.log_file)
+                client.log_batch(
+                    run_id,
+                    metrics=batch["metrics"],
+                    params=batch["params"],
+                    tags=batch["tags"],
+                )
+
+                self.log_writer.log(
+                    f"Logged the batch of {run_id} run to mlflow", self.log_file
+                )
+
+            else:
+                self.log_writer.log(
+                    f"No pending batch found for {run_id} run", self.log_file
+                )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -378,12 +710,15 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def log_all_for_model(self, model, model_score: float, idx: int = None):
+    def log_all_for_model(
+        self, model, model_score: float, idx: int = None, run_id: str = None
+    ):
         """
         Method Name :   log_all_for_model
-        Description :   This method logs model,model params and model score to mlflow server
+        Description :   This method logs model to mlflow server, and adds the model params, model score and model
+                        tags to the batch of the run. The batch is logged when the run batch is flushed
 
-        Output      :   Model,model parameters and model score are logged to mlflow server
+        Output      :   Model is logged to mlflow server, and model parameters and model score are added to the batch
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -399,28 +734,42 @@ class MLFlow_Operation:
 
             base_model_name = model.__class__.__name__
 
-            if base_model_name is "KMeans":
-                self.log_sklearn_model(model, base_model_name)
+            if run_id is None:
+                run_id = active_run().info.run_id
+
+            if base_model_name.endswith("KMeans"):
+                self.log_sklearn_model(model, "KMeans", run_id)
 
             else:
                 model_name = base_model_name + str(idx)
 
-                self.log_writer.log(
-                    self.log_file, f"Got the model name as {model_name}",
-                )
+                self.log_writer.log(f"Got the model name as {model_name}", self.log_file)
 
-                model_params_list = list(self.config[model_name].keys())
+                model_params = model.get_params()
+
+                params = [
+                    Param(f"{model_name}-{param}", str(model_params[param]))
+                    for param in self.config["model_params"][base_model_name]
+                ]
 
                 self.log_writer.log(
-                    self.log_file, f"Created a list of params based on {model_name}",
+                    f"Created a list of params based on {model_name}", self.log_file
                 )
 
-                for param in model_params_list:
-                    self.log_model_param(idx, model, model_name, param=param)
+                metrics = [
+                    Metric(
+                        f"{model_name}-best_score",
+                        float(model_score),
+                        int(time() * 1000),
+                        0,
+                    )
+                ]
+
+                tags = [RunTag(f"{model_name}-cluster", str(idx))]
 
-                self.log_sklearn_model(model, model_name)
+                self.add_to_run_batch(run_id, metrics=metrics, params=params, tags=tags)
 
-                self.log_model_metric(model_name, metric=float(model_score))
+                self.log_sklearn_model(model, model_name, run_id)
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -431,100 +780,149 @@ class MLFlow_Operation:
                 e, self.class_name, method_name, self.log_file
             )
 
-    def transition_mlflow_model(
-        self,
-        model_version: int,
-        stage: str,
-        model_name: str,
-        from_bucket: str,
-        to_bucket: str,
-    ):
+    def get_session_model_versions(self, model_names: list, run_ids: list):
         """
-        Method Name :   transition_mlflow_model
-        Description :   This method transitions mlflow model from one stage to other stage, and does the same in s3 bucket
+        Method Name :   get_session_model_versions
+        Description :   This method gets the latest registered version of every model name which was logged by one
+                        of the runs of the session. The versions are searched by name for every model, concurrently
+                        with max_workers from mlflow config, so the lookup does not depend on the registry size
 
-        Output      :   A mlflow model is transitioned from one stage to another, and same is reflected in s3 bucket
+        Output      :   A dictionary of model name and model version is returned
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         
         Revisions   :   moved setup to cloud
         """
-        method_name = self.transition_mlflow_model.__name__
+        method_name = self.get_session_model_versions.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
         try:
-            current_version = model_version
+            client = self.get_mlflow_client()
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(
+                    lambda name: client.search_model_versions(f"name='{name}'"),
+                    model_names,
+                )
+
+                model_versions = {}
+
+                for model_name, mvs in zip(model_names, results):
+                    session_mvs = [mv for mv in mvs if mv.run_id in run_ids]
+
+                    if len(session_mvs) > 0:
+                        mv = max(session_mvs, key=lambda mv: int(mv.version))
+
+                        model_versions[model_name] = mv.version
+
+            missing_models = set(model_names) - set(model_versions)
+
+            if len(missing_models) > 0:
+                raise Exception(
+                    f"No registered version found in the session for {sorted(missing_models)} models"
+                )
 
             self.log_writer.log(
-                f"Got {current_version} as the current model version", self.log_file
+                f"Got {model_versions} as the model versions of the session",
+                self.log_file,
             )
 
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return model_versions
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def transition_mlflow_model(self, model_version: int, stage: str, model_name: str):
+        """
+        Method Name :   transition_mlflow_model
+        Description :   This method transitions mlflow model version to the stage. When the stage is Production, the
+                        existing production versions of the model are archived
+
+        Output      :   A mlflow model is transitioned from one stage to another
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.transition_mlflow_model.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if stage not in ("Production", "Staging"):
+                raise ValueError(f"{stage} is not a valid stage for model transition")
+
             client = self.get_mlflow_client()
 
-            trained_model_file = (
-                self.trained_models_dir + "/" + model_name + self.model_save_format
+            client.transition_model_version_stage(
+                name=model_name,
+                version=model_version,
+                stage=stage,
+                archive_existing_versions=stage == "Production",
             )
 
-            stag_model_file = (
-                self.staged_models_dir + "/" + model_name + self.model_save_format
+            self.log_writer.log(
+                f"Transitioned version {model_version} of {model_name} to {stage} in mlflow",
+                self.log_file,
             )
 
-            prod_model_file = (
-                self.prod_models_dir + "/" + model_name + self.model_save_format
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
             )
 
-            self.log_writer.log(
-                "Created trained,stag and prod model files", self.log_file
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
             )
 
-            if stage == "Production":
-                self.log_writer.log(
-                    f"{stage} is selected for transition", self.log_file
-                )
+    def promote_mlflow_models(self, transitions: list):
+        """
+        Method Name :   promote_mlflow_models
+        Description :   This method runs the registry transitions concurrently, using a thread pool of max_workers from
+                        mlflow config. The transitions is a list of (model name, model version, stage)
 
-                client.transition_model_version_stage(
-                    name=model_name, version=current_version, stage=stage
-                )
+        Output      :   All the models are transitioned in mlflow
+        On Failure  :   Write an exception log and then raise an exception
 
-                self.log_writer.log(
-                    f"Transitioned {model_name} to {stage} in mlflow", self.log_file
-                )
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.promote_mlflow_models.__name__
 
-                self.s3.copy_data(
-                    trained_model_file,
-                    from_bucket,
-                    prod_model_file,
-                    to_bucket,
-                    self.log_file,
-                )
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
 
-            elif stage == "Staging":
-                self.log_writer.log(
-                    f"{stage} is selected for transition", self.log_file
-                )
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.transition_mlflow_model, model_version, stage, model_name
+                    )
+                    for model_name, model_version, stage in transitions
+                ]
 
-                client.transition_model_version_stage(
-                    model_name, current_version, stage
-                )
+                errors = [f.exception() for f in futures]
 
-                self.log_writer.log(
-                    f"Transitioned {model_name} to {stage} in mlflow", self.log_file
-                )
+            errors = [e for e in errors if e is not None]
 
-                self.s3.copy_data(
-                    trained_model_file,
-                    from_bucket,
-                    stag_model_file,
-                    to_bucket,
-                    self.log_file,
+            if len(errors) > 0:
+                raise Exception(
+                    f"{len(errors)} of {len(futures)} registry transitions failed, first error : {errors[0]}"
                 )
 
-            else:
-                self.log_writer.log(
-                    "Please select stage for model transition", self.log_file
-                )
+            self.log_writer.log(
+                f"Transitioned {len(transitions)} models in mlflow",
+                self.log_file,
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.log_file
@@ -0,0 +1,126 @@
+from numpy import array_equal, ascontiguousarray, asarray, einsum, empty, float64, int32
+from numpy.random import default_rng
+from utils.logger import App_Logger
+from utils.read_params import read_params
+
+
+class Cluster_Router:
+    """
+    Description :   This class is used for routing the rows to the nearest cluster centroid at serve time, without the
+                    sklearn KMeans object. The squared norms of the centroids are computed once, and the rows are
+                    assigned in blocks with argmin(||c||^2 - 2 x.c) in float64, which is the same distance that
+                    KMeans.predict uses, so the assignments are identical
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, cluster_centers, log_file):
+        self.config = read_params()
+
+        self.class_name = self.__class__.__name__
+
+        self.log_writer = App_Logger()
+
+        self.log_file = log_file
+
+        self.router_params = self.config["cluster_router"]
+
+        self.block_size = self.router_params["block_size"]
+
+        centers = asarray(cluster_centers, dtype=float64)
+
+        self.centers_t = ascontiguousarray(centers.T)
+
+        self.centers_sq_norms = einsum("ij,ij->i", centers, centers)
+
+    def predict(self, X):
+        """
+        Method Name :   predict
+        Description :   This method assigns every row to the nearest cluster centroid, the rows are processed in blocks
+                        of block_size, so that the distance matrix of a block stays in cache
+
+        Output      :   An array of cluster ids is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.predict.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            X = ascontiguousarray(X, dtype=float64)
+
+            labels = empty(X.shape[0], dtype=int32)
+
+            for start in range(0, X.shape[0], self.block_size):
+                dist = X[start : start + self.block_size] @ self.centers_t
+
+                dist *= -2.0
+
+                dist += self.centers_sq_norms
+
+                labels[start : start + self.block_size] = dist.argmin(axis=1)
+
+            self.log_writer.log(
+                f"Routed {X.shape[0]} rows to {len(self.centers_sq_norms)} clusters",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return labels
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def verify(self, kmeans):
+        """
+        Method Name :   verify
+        Description :   This method checks that the router gives the same assignments as kmeans.predict, on the
+                        centroids and on verify_samples random rows of ternary features
+
+        Output      :   True is returned when the assignments are identical
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.verify.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            n_features = self.centers_t.shape[0]
+
+            rng = default_rng(self.router_params["seed"])
+
+            sample = rng.integers(
+                -1, 2, size=(self.router_params["verify_samples"], n_features)
+            ).astype(float64)
+
+            sample[: self.centers_t.shape[1]] = self.centers_t.T
+
+            is_identical = array_equal(self.predict(sample), kmeans.predict(sample))
+
+            self.log_writer.log(
+                f"Router assignments identical to {kmeans.__class__.__name__} is {is_identical}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return is_identical
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
@@ -1,7 +1,13 @@
+from datetime import datetime
+from re import compile
+
 from phising.mlflow_utils.mlflow_operations import MLFlow_Operation
+from phising.model.cluster_router import Cluster_Router
+from phising.model.tree_ensemble import Tree_Exporter
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
 from utils.read_params import read_params
+from utils.schema_utils import Schema_Utils
 
 
 class Load_Prod_Model:
@@ -12,7 +18,9 @@ class Load_Prod_Model:
     Revisions   :   Moved to setup to cloud 
     """
 
-    def __init__(self, num_clusters: str):
+    score_col_pattern = compile(r"^metrics\.(?P<model>\D+)(?P<cluster>\d+)-best_score$")
+
+    def __init__(self, num_clusters: int, run_id: str = None):
         self.log_writer = App_Logger()
 
         self.config = read_params()
@@ -21,20 +29,42 @@ class Load_Prod_Model:
 
         self.num_clusters = num_clusters
 
-        self.model_bucket = self.config["s3_bucket"]["wafer_model"]
+        self.session_run_id = run_id
+
+        self.model_bucket = self.config["s3_bucket"]["phising_model"]
 
-        self.load_prod_model_log = self.config["train_db_log"]["Load_Prod_Model"]
+        self.load_prod_model_log = self.config["train_db_log"]["load_prod_model"]
 
         self.prod_model_dir = self.config["models_dir"]["prod"]
 
         self.stag_model_dir = self.config["models_dir"]["stag"]
 
+        self.trained_model_dir = self.config["models_dir"]["trained"]
+
+        self.model_save_format = self.config["model_save_format"]
+
+        self.imputer_name = self.config["imputer"]["model_name"]
+
+        self.imputer_file = (
+            self.config["imputer"]["model_name"] + self.model_save_format
+        )
+
+        self.prod_manifest_file = (
+            self.prod_model_dir + self.config["prod_manifest_file"]
+        )
+
+        self.prod_bundle_file = self.config["prod_bundle_file"]
+
         self.exp_name = self.config["mlflow_config"]["experiment_name"]
 
         self.s3 = S3_Operation()
 
         self.mlflow_op = MLFlow_Operation(self.load_prod_model_log)
 
+        self.schema_utils = Schema_Utils(self.load_prod_model_log)
+
+        self.tree_exporter = Tree_Exporter(self.load_prod_model_log)
+
     def create_folders_for_prod_and_stag(self, bucket: str, log_file):
         """
         Method Name :   create_folders_for_prod_and_stag
@@ -61,161 +91,364 @@ class Load_Prod_Model:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def load_production_model(self):
+    def select_best_models(self, runs):
         """
-        Method Name :   load_production_model
-        Description :   This method is responsible for finding the best model based on metrics and then transitioned them to thier stages
+        Method Name :   select_best_models
+        Description :   This method selects the best model of every cluster from the runs of the session. Only the
+                        best score metric columns are used, the model name and cluster id are parsed from the column
+                        name, and the model with the max score of every cluster is picked in one grouped operation
 
-        Output      :   The best models are put in production and rest are put in staging
+        Eg- metrics.XGBClassifier10-best_score is the score of XGBClassifier model for cluster 10
+
+        Output      :   A dictionary of cluster id and the best model name of the cluster is returned
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         
         Revisions   :   moved setup to cloud
         """
-        method_name = self.load_production_model.__name__
+        method_name = self.select_best_models.__name__
 
         self.log_writer.start_log(
             "start", self.class_name, method_name, self.load_prod_model_log
         )
 
         try:
-            self.create_folders_for_prod_and_stag(
-                self.model_bucket, self.load_prod_model_log
+            score_cols = sorted(
+                col for col in runs.columns if self.score_col_pattern.match(col)
             )
 
-            self.mlflow_op.set_mlflow_tracking_uri()
-
-            exp = self.mlflow_op.get_experiment_from_mlflow(self.exp_name)
+            scores = (
+                runs[score_cols]
+                .melt(var_name="metric", value_name="score")
+                .dropna(subset=["score"])
+            )
 
-            runs = self.mlflow_op.get_runs_from_mlflow(exp.experiment_id)
+            parts = scores["metric"].str.extract(self.score_col_pattern)
 
-            """
-            Code Explaination: 
-            num_clusters - Dynamically allocated based on the number of clusters created using elbow plot
+            scores["model"] = parts["model"] + parts["cluster"]
 
-            Here, we are trying to iterate over the number of clusters and then dynamically create the cols 
-            where in the best model names can be found, and then copied to production or staging depending on
-            the condition
+            scores["cluster"] = parts["cluster"].astype(int)
 
-            Eg- metrics.XGBoost1-best_score
-            """
-            reg_model_names = self.mlflow_op.get_mlflow_models()
+            best = scores.loc[scores.groupby("cluster")["score"].idxmax()]
 
-            cols = [
-                "metrics." + str(model) + "-best_score"
-                for model in reg_model_names
-                if model != "KMeans"
-            ]
+            best_models = dict(zip(best["cluster"], best["model"]))
 
             self.log_writer.log(
-                self.load_prod_model_log, "Created cols for all registered model"
+                f"Selected {best_models} as the best models of the clusters",
+                self.load_prod_model_log,
+            )
+
+            missing_clusters = set(range(self.num_clusters)) - set(best_models)
+
+            if len(missing_clusters) > 0:
+                raise Exception(
+                    f"No model score found for {sorted(missing_clusters)} clusters"
+                )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.load_prod_model_log
+            )
+
+            return best_models
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.load_prod_model_log
+            )
+
+    def get_prod_manifest(
+        self, prod_model_dir: str, best_models: dict, model_versions: dict
+    ):
+        """
+        Method Name :   get_prod_manifest
+        Description :   This method builds the manifest of the production set. Every cluster id is mapped to the key,
+                        registry version and etag of its model, and to the hash of the feature columns of the imputer,
+                        so that the predictor resolves the model of a cluster with a dictionary lookup
+
+        Output      :   The production manifest is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_prod_manifest.__name__
+
+        self.log_writer.start_log(
+            "start", self.class_name, method_name, self.load_prod_model_log
+        )
+
+        try:
+            imputer_key = prod_model_dir + self.imputer_file
+
+            imputer = self.s3.load_model_from_key(
+                imputer_key, self.model_bucket, self.load_prod_model_log
             )
 
-            runs_cols = runs[cols].max().sort_values(ascending=False)
+            schema_hash = self.schema_utils.get_schema_hash(imputer["columns"])
+
+            def get_entry(model_name: str, model_version: str = None):
+                key = prod_model_dir + model_name + self.model_save_format
+
+                return {
+                    "model_name": model_name,
+                    "key": key,
+                    "version": model_version,
+                    "etag": self.s3.get_etag(
+                        key, self.model_bucket, self.load_prod_model_log
+                    ),
+                }
+
+            manifest = {
+                "version": self.session_run_id,
+                "created_at": datetime.now().isoformat(),
+                "model_dir": prod_model_dir,
+                "schema_hash": schema_hash,
+                "imputer": get_entry(self.imputer_name),
+                "kmeans": get_entry("KMeans", model_versions["KMeans"]),
+                "clusters": {
+                    str(cluster): get_entry(model_name, model_versions[model_name])
+                    for cluster, model_name in best_models.items()
+                },
+            }
 
             self.log_writer.log(
-                "Sorted the runs cols in descending order", self.load_prod_model_log
-            )
-
-            metrics_dict = runs_cols.to_dict()
-
-            self.log_writer.log("Converted runs cols to dict", self.load_prod_model_log)
-
-            """ 
-            Eg-output: For 3 clusters, 
-            
-            [
-                metrics.XGBoost0-best_score,
-                metrics.XGBoost1-best_score,
-                metrics.XGBoost2-best_score,
-                metrics.RandomForest0-best_score,
-                metrics.RandomForest1-best_score,
-                metrics.RandomForest2-best_score
-            ] 
-
-            Eg- runs_dataframe: I am only showing for 3 cols,actual runs dataframe will be different
-                                based on the number of clusters
-                
-                since for every run cluster values changes, rest two cols will be left as blank,
-                so only we are taking the max value of each col, which is nothing but the value of the metric
-                
-
-run_number  metrics.XGBoost0-best_score metrics.RandomForest1-best_score metrics.XGBoost1-best_score
-    0                   1                       0.5
-    1                                                                                   1                 
-    2                                                                           
-            """
-
-            best_metrics_names = [
-                max(
-                    [
-                        (file, metrics_dict[file])[0]
-                        for file in metrics_dict
-                        if str(i) in file
-                    ]
+                f"Built manifest of {self.session_run_id} production set with {len(best_models)} clusters",
+                self.load_prod_model_log,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.load_prod_model_log
+            )
+
+            return manifest
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.load_prod_model_log
+            )
+
+    def create_prod_bundle(self, manifest: dict):
+        """
+        Method Name :   create_prod_bundle
+        Description :   This method creates the serving bundle of the production set, with the KMeans centroids, the
+                        classifier of every cluster, the fitted imputer with its statistics and the schema. Every model
+                        is loaded from the production folder and checked against the manifest etag. The centroids are
+                        added when the cluster router gives the same assignments as the KMeans model, else the KMeans
+                        model is added, and the classifiers are added as flattened tree ensembles
+
+        Output      :   The production bundle is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.create_prod_bundle.__name__
+
+        self.log_writer.start_log(
+            "start", self.class_name, method_name, self.load_prod_model_log
+        )
+
+        try:
+            entries = [manifest["imputer"], manifest["kmeans"]] + list(
+                manifest["clusters"].values()
+            )
+
+            models = {
+                entry["model_name"]: self.s3.load_model_from_key(
+                    entry["key"],
+                    self.model_bucket,
+                    self.load_prod_model_log,
+                    etag=entry["etag"],
                 )
-                for i in range(0, self.num_clusters)
-            ]
+                for entry in entries
+            }
+
+            imputer = models.pop(self.imputer_name)
+
+            kmeans = models.pop("KMeans")
+
+            router = Cluster_Router(kmeans.cluster_centers_, self.load_prod_model_log)
+
+            ## The router is only an optimisation, when its assignments differ the KMeans model is served instead
+
+            is_verified = router.verify(kmeans)
+
+            if not is_verified:
+                self.log_writer.log(
+                    "Cluster router assignments differ from KMeans model, serving KMeans model",
+                    self.load_prod_model_log,
+                )
+
+            ## The classifiers are flattened for serving, a classifier is kept as it is when its flattened
+            ## predictions are not identical
+
+            models = {
+                model_name: self.tree_exporter.export_model(model, imputer["columns"])
+                for model_name, model in models.items()
+            }
+
+            bundle = {
+                "version": manifest["version"],
+                "manifest": manifest,
+                "schema": {
+                    "columns": list(imputer["columns"]),
+                    "schema_hash": manifest["schema_hash"],
+                },
+                "imputer": imputer,
+                "cluster_centers": kmeans.cluster_centers_ if is_verified else None,
+                "kmeans": None if is_verified else kmeans,
+                "models": models,
+            }
 
             self.log_writer.log(
-                f"Got top model names based on the metrics of clusters",
+                f"Created bundle of {manifest['version']} production set with {len(models)} models",
                 self.load_prod_model_log,
             )
 
-            ## best_metrics will store the value of metrics, but we want the names of the models,
-            ## so best_metrics.index will return the name of the metric as registered in mlflow
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.load_prod_model_log
+            )
+
+            return bundle
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.load_prod_model_log
+            )
+
+    def load_production_model(self):
+        """
+        Method Name :   load_production_model
+        Description :   This method is responsible for finding the best model based on metrics and then transitioned them to thier stages.
+                        The model files are copied and bundled, the production set is published with a manifest file,
+                        and only then the registry transitions are run concurrently
+
+        Output      :   The best models are put in production and rest are put in staging
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.load_production_model.__name__
+
+        self.log_writer.start_log(
+            "start", self.class_name, method_name, self.load_prod_model_log
+        )
+
+        try:
+            self.create_folders_for_prod_and_stag(
+                self.model_bucket, self.load_prod_model_log
+            )
+
+            exp_id = self.mlflow_op.start_mlflow_session(self.exp_name)
+
+            if self.session_run_id is None:
+                self.session_run_id = self.mlflow_op.get_latest_session_run_id(exp_id)
 
-            ## Eg. metrics.XGBoost1-best_score
+            runs = self.mlflow_op.get_runs_from_mlflow(exp_id, self.session_run_id)
 
-            ## top_mn_lst - will store the top 3 model names
+            best_models = self.select_best_models(runs)
 
-            top_mn_lst = [mn.split(".")[1].split("-")[0] for mn in best_metrics_names]
+            top_mn_lst = list(best_models.values()) + ["KMeans"]
 
             self.log_writer.log(f"Got the top model names", self.load_prod_model_log)
 
-            results = self.mlflow_op.search_mlflow_models("DESC")
-
-            ## results - This will store all the registered models in mlflow
-            ## Here we are iterating through all the registered model and for every latest registered model
-            ## we are checking if the model name is in the top 3 model list, if present we are putting that
-            ## model into production or staging
-
-            for res in results:
-                for mv in res.latest_versions:
-                    if mv.name in top_mn_lst:
-                        self.mlflow_op.transition_mlflow_model(
-                            mv.version,
-                            "Production",
-                            mv.name,
-                            self.model_bucket,
-                            self.model_bucket,
-                        )
+            session_model_names = [
+                match.group("model") + match.group("cluster")
+                for match in map(self.score_col_pattern.match, runs.columns)
+                if match is not None
+            ]
+
+            model_versions = self.mlflow_op.get_session_model_versions(
+                session_model_names + ["KMeans"],
+                list(runs["run_id"]) + [self.session_run_id],
+            )
+
+            ## The production models of the session are copied to a folder named after the session run, so that
+            ## the current production set is never overwritten while it is being promoted
+
+            prod_model_dir = self.prod_model_dir + self.session_run_id + "/"
+
+            transitions, files = [], []
+
+            for model_name, model_version in model_versions.items():
+                model_file = model_name + self.model_save_format
 
-                    ## In the registered models, even kmeans model is present, so during Prediction,
-                    ## this model also needs to be in present in production, the code logic is present below
+                if model_name in top_mn_lst:
+                    transitions.append((model_name, model_version, "Production"))
 
-                    elif mv.name == "KMeans":
-                        self.mlflow_op.transition_mlflow_model(
-                            mv.version,
-                            "Production",
-                            mv.name,
-                            self.model_bucket,
-                            self.model_bucket,
+                    files.append(
+                        (
+                            self.trained_model_dir + model_file,
+                            prod_model_dir + model_file,
                         )
+                    )
 
-                    else:
-                        self.mlflow_op.transition_mlflow_model(
-                            mv.version,
-                            "Staging",
-                            mv.name,
-                            self.model_bucket,
-                            self.model_bucket,
+                else:
+                    transitions.append((model_name, model_version, "Staging"))
+
+                    files.append(
+                        (
+                            self.trained_model_dir + model_file,
+                            self.stag_model_dir + model_file,
                         )
+                    )
+
+            files.append(
+                (
+                    self.trained_model_dir + self.imputer_file,
+                    prod_model_dir + self.imputer_file,
+                )
+            )
+
+            ## The registry is only transitioned once the production set is published, so that a failure while
+            ## copying, bundling or uploading leaves the registry and the served production set unchanged
+
+            self.s3.copy_files(
+                files, self.model_bucket, self.model_bucket, self.load_prod_model_log
+            )
+
+            manifest = self.get_prod_manifest(
+                prod_model_dir, best_models, model_versions
+            )
+
+            bundle = self.create_prod_bundle(manifest)
+
+            ## The bundle is written to the folder of the session run, so the bundle of the current production
+            ## set is never overwritten, and the manifest is the only key which changes on promotion
+
+            bundle_file = prod_model_dir + self.prod_bundle_file
+
+            checksum = self.s3.upload_bundle(
+                bundle, bundle_file, self.model_bucket, self.load_prod_model_log,
+            )
+
+            manifest["bundle"] = {"key": bundle_file, "sha256": checksum}
+
+            ## The manifest is uploaded only after all the files and the bundle are written, a single put is
+            ## atomic, so the readers of the manifest see either the old production set or the new one
+
+            self.s3.upload_json(
+                manifest,
+                self.prod_manifest_file,
+                self.model_bucket,
+                self.load_prod_model_log,
+            )
 
             self.log_writer.log(
+                f"Published {self.session_run_id} production set in {self.prod_manifest_file}",
                 self.load_prod_model_log,
+            )
+
+            self.mlflow_op.promote_mlflow_models(transitions)
+
+            self.log_writer.log(
                 "Transitioning of models based on scores successfully done",
+                self.load_prod_model_log,
             )
 
             self.log_writer.start_log(
@@ -0,0 +1,307 @@
+from collections import OrderedDict
+from threading import Lock
+
+from numpy import (
+    arange,
+    asarray,
+    bincount,
+    concatenate,
+    empty,
+    flatnonzero,
+    isin,
+    uint64,
+    unique,
+    where,
+    zeros,
+)
+from utils.logger import App_Logger
+from utils.read_params import read_params
+
+
+class Prediction_Cache:
+    """
+    Description :   This class is a process level LRU cache of the predictions of the production set, in front of the
+                    cluster router and the classifiers. A row is keyed by its features packed with 2 bits per feature,
+                    (x + 1) << 2i, so the 30 ternary features fit in a 64 bit integer. Only the rows with all the
+                    features in {-1, 0, 1} are cached. The hits are the rows served from the cache and the misses
+                    are the rows scored. The cache holds the production bundle and router of a single version, and
+                    is cleared when the version of the production manifest changes
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    version = None
+
+    bundle = None
+
+    router = None
+
+    entries = OrderedDict()
+
+    hits = 0
+
+    misses = 0
+
+    cache_lock = Lock()
+
+    def __init__(self, log_file):
+        self.config = read_params()
+
+        self.class_name = self.__class__.__name__
+
+        self.log_writer = App_Logger()
+
+        self.log_file = log_file
+
+        self.cache_params = self.config["prediction_cache"]
+
+        self.enabled = self.cache_params["enabled"]
+
+        self.max_size = self.cache_params["max_size"]
+
+    def get_bundle(self, version):
+        """
+        Method Name :   get_bundle
+        Description :   This method gets the cached bundle and router of the production set, when they are of the
+                        given version
+
+        Output      :   The bundle and router are returned, or None, None when the cache is of another version
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_bundle.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            with self.cache_lock:
+                cls = self.__class__
+
+                is_current = cls.version is not None and cls.version == version
+
+                bundle = cls.bundle if is_current else None
+
+                router = cls.router if is_current else None
+
+            self.log_writer.log(
+                f"Cached bundle is current for {version} version is {is_current}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return bundle, router
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def set_bundle(self, version, bundle: dict, router):
+        """
+        Method Name :   set_bundle
+        Description :   This method sets the bundle and router of the production set, the cached predictions and the
+                        hit and miss counts are cleared when the version changes
+
+        Output      :   The bundle and router are cached for the version
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.set_bundle.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            with self.cache_lock:
+                cls = self.__class__
+
+                if cls.version != version:
+                    self.log_writer.log(
+                        f"Production version changed from {cls.version} to {version}, cleared {len(cls.entries)} cached predictions",
+                        self.log_file,
+                    )
+
+                    cls.entries.clear()
+
+                    cls.hits, cls.misses = 0, 0
+
+                cls.version, cls.bundle, cls.router = version, bundle, router
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_keys(self, X):
+        """
+        Method Name :   get_keys
+        Description :   This method packs the features of every row into a 64 bit key, with 2 bits per feature.
+                        The rows which have a feature outside {-1, 0, 1} have no key, and are neither deduplicated
+                        nor cached
+
+        Output      :   The keys of the rows and the mask of the cacheable rows are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_keys.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            n_rows, n_features = X.shape
+
+            if n_features > 32:
+                mask = zeros(n_rows, dtype=bool)
+
+            else:
+                mask = isin(X, (-1, 0, 1)).all(axis=1)
+
+            codes = where(mask[:, None], X + 1, 0).astype(uint64)
+
+            codes <<= (2 * arange(n_features)).astype(uint64)
+
+            keys = codes.sum(axis=1, dtype=uint64)
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return keys, mask
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def predict(self, data, predict_func, version):
+        """
+        Method Name :   predict
+        Description :   This method predicts the rows through the cache. The cacheable rows are deduplicated on their
+                        keys, the keys found in the cache are taken from it, and only the first row of every missed key
+                        along with the rows which are not cacheable are scored with predict_func in one call. The
+                        predictions of the missed keys are then added to the cache, dropping the least recently used
+                        keys above max_size. The cache is only read and written when it is enabled and of the version
+                        which predict_func scores with, the rows are deduplicated within the batch either way
+
+        Output      :   An array of predictions in the order of the rows is returned, which is empty for an empty
+                        batch
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.predict.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if len(data) == 0:
+                self.log_writer.log("Got an empty batch to predict", self.log_file)
+
+                self.log_writer.start_log(
+                    "exit", self.class_name, method_name, self.log_file
+                )
+
+                return empty(0)
+
+            keys, mask = self.get_keys(data.to_numpy())
+
+            keyed_rows, other_rows = flatnonzero(mask), flatnonzero(~mask)
+
+            unique_keys, first_rows, inverse = unique(
+                keys[keyed_rows], return_index=True, return_inverse=True
+            )
+
+            cls = self.__class__
+
+            with self.cache_lock:
+                is_current = self.enabled and cls.version == version
+
+                values = [
+                    cls.entries.get(key) if is_current else None
+                    for key in unique_keys.tolist()
+                ]
+
+                for key, value in zip(unique_keys.tolist(), values):
+                    if value is not None:
+                        cls.entries.move_to_end(key)
+
+            missed = [i for i, value in enumerate(values) if value is None]
+
+            row_counts = bincount(inverse, minlength=len(unique_keys))
+
+            cached_counts = row_counts[
+                [i for i, value in enumerate(values) if value is not None]
+            ]
+
+            score_rows = concatenate([keyed_rows[first_rows[missed]], other_rows])
+
+            scored = predict_func(data.iloc[score_rows]) if len(score_rows) else []
+
+            with self.cache_lock:
+                is_current = self.enabled and cls.version == version
+
+                for i, value in zip(missed, scored[: len(missed)]):
+                    values[i] = value
+
+                    if is_current:
+                        cls.entries[unique_keys[i].item()] = value
+
+                while len(cls.entries) > self.max_size:
+                    cls.entries.popitem(last=False)
+
+                ## Both counts are in rows, the rows served from the cache are hits and the rows scored are
+                ## misses, the rest of the rows are duplicates of a scored row in the batch
+
+                cls.hits += int(cached_counts.sum())
+
+                cls.misses += len(score_rows)
+
+                hits, misses, size = cls.hits, cls.misses, len(cls.entries)
+
+            preds, rows = [], []
+
+            if len(keyed_rows):
+                preds.append(asarray(values)[inverse])
+
+                rows.append(keyed_rows)
+
+            if len(other_rows):
+                preds.append(scored[len(missed) :])
+
+                rows.append(other_rows)
+
+            pred = concatenate(preds)
+
+            result = empty(len(pred), dtype=pred.dtype)
+
+            result[concatenate(rows)] = pred
+
+            self.log_writer.log(
+                f"Scored {len(score_rows)} of {len(result)} rows, {int(cached_counts.sum())} rows from cache, total row hits {hits}, misses {misses}, hit rate {hits / max(hits + misses, 1):.3f}, size {size}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return result
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
@@ -1,10 +1,13 @@
-from botocore.exceptions import ClientError
-from pandas import DataFrame
+from numpy import empty, flatnonzero, unique
+from pandas import Series
 from phising.data_ingestion.data_loader_prediction import Data_Getter_Pred
 from phising.data_preprocessing.preprocessing import Preprocessor
+from phising.model.cluster_router import Cluster_Router
+from phising.model.prediction_cache import Prediction_Cache
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
 from utils.read_params import read_params
+from utils.schema_utils import Schema_Utils
 
 
 class Prediction:
@@ -23,10 +26,14 @@ class Prediction:
 
         self.model_bucket = self.config["s3_bucket"]["phising_model"]
 
-        self.input_files_bucket = self.config["s3_bucket"]["inputs_files"]
+        self.input_files_bucket = self.config["s3_bucket"]["input_files"]
 
         self.prod_model_dir = self.config["models_dir"]["prod"]
 
+        self.prod_manifest_file = (
+            self.prod_model_dir + self.config["prod_manifest_file"]
+        )
+
         self.pred_output_file = self.config["pred_output_file"]
 
         self.log_writer = App_Logger()
@@ -37,6 +44,10 @@ class Prediction:
 
         self.preprocessor = Preprocessor(self.pred_log)
 
+        self.schema_utils = Schema_Utils(self.pred_log)
+
+        self.prediction_cache = Prediction_Cache(self.pred_log)
+
         self.class_name = self.__class__.__name__
 
     def delete_pred_file(self, log_file):
@@ -56,64 +67,210 @@ class Prediction:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.s3.load_object(
+            if self.s3.object_exists(
                 self.pred_output_file, self.input_files_bucket, log_file
+            ):
+                self.log_writer.log(
+                    f"Found existing Prediction batch file. Deleting it.", log_file
+                )
+
+                self.s3.delete_file(
+                    self.pred_output_file, self.input_files_bucket, log_file
+                )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_prod_manifest(self, bucket: str, log_file):
+        """
+        Method Name :   get_prod_manifest
+        Description :   This method gets the manifest of the current production set, along with the version of the
+                        set, which is the session run id along with the checksum of the bundle
+
+        Output      :   The production manifest and version are returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_prod_manifest.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            manifest = self.s3.read_json(self.prod_manifest_file, bucket, log_file)
+
+            version = f"{manifest['version']}-{manifest['bundle']['sha256']}"
+
+            self.log_writer.log(f"Got {version} as the production version", log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return manifest, version
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_prod_bundle(self, manifest: dict, bucket: str, log_file):
+        """
+        Method Name :   get_prod_bundle
+        Description :   This method loads the bundle of the production manifest with a single get. The checksum and
+                        the version of the bundle are checked against the manifest
+
+        Output      :   The production bundle is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_prod_bundle.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            bundle = self.s3.load_bundle(
+                manifest["bundle"]["key"],
+                bucket,
+                log_file,
+                checksum=manifest["bundle"]["sha256"],
             )
 
+            if bundle["version"] != manifest["version"]:
+                raise Exception(
+                    f"Bundle version {bundle['version']} does not match the manifest version {manifest['version']}"
+                )
+
             self.log_writer.log(
-                f"Found existing Prediction batch file. Deleting it.", log_file
+                f"Got {bundle['version']} as the production version", log_file
             )
 
-            self.s3.delete_file(self.pred_output_file, self.input_files_bucket)
-
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "404":
-                pass
+            return bundle
 
-            else:
-                self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def find_correct_model_file(self, cluster_number: str, bucket: str, log_file):
+    def check_schema(self, data, bundle: dict, manifest: dict, log_file):
         """
-        Method Name :   find_correct_model_file
-        Description :   This method gets correct model file based on cluster number during prediction
+        Method Name :   check_schema
+        Description :   This method checks the schema served to the models against the production schema. The feature
+                        columns of the incoming data, in the order they arrive, are hashed and compared with the schema
+                        hash of the production manifest, so a missing, renamed or reordered feature column is caught
+                        before the rows are imputed and predicted
 
-        Output      :   A correct model file is found 
+        Output      :   None
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         Written by  :   iNeuron Intelligence
         Revisions   :   moved setup to cloud
         """
-        method_name = self.find_correct_model_file.__name__
+        method_name = self.check_schema.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            list_of_files = self.s3.get_files_from_folder(
-                self.prod_model_dir, bucket, log_file
+            schema_cols = set(bundle["schema"]["columns"])
+
+            feature_cols = [col for col in data.columns if col in schema_cols]
+
+            schema_hash = self.schema_utils.get_schema_hash(feature_cols)
+
+            if schema_hash != manifest["schema_hash"]:
+                missing_cols = schema_cols.difference(feature_cols)
+
+                raise Exception(
+                    f"Feature columns of the prediction data do not match the production schema, missing columns are {sorted(missing_cols)}"
+                )
+
+            self.log_writer.log(
+                f"Feature columns of the prediction data match {manifest['schema_hash']} schema hash",
+                log_file,
             )
 
-            for file in list_of_files:
-                try:
-                    if file.index(str(cluster_number)) != -1:
-                        model_name = file
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def find_correct_model_file(self, cluster_number: int, manifest: dict, log_file):
+        """
+        Method Name :   find_correct_model_file
+        Description :   This method gets the model entry of the cluster from the production manifest
+
+        Output      :   The manifest entry with key, version and etag of the cluster model is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.find_correct_model_file.__name__
 
-                except:
-                    continue
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
-            model_name = model_name.split(".")[0]
+        try:
+            model_entry = manifest["clusters"][str(int(cluster_number))]
 
             self.log_writer.log(
-                f"Got {model_name} from {self.prod_model_dir} folder in {bucket} bucket",
+                f"Got {model_entry['model_name']} version {model_entry['version']} for cluster {cluster_number}",
                 log_file,
             )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
-            return model_name
+            return model_entry
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def predict_rows(self, data, bundle: dict, router, log_file):
+        """
+        Method Name :   predict_rows
+        Description :   This method routes the rows to their clusters, with the cluster router or with the KMeans model
+                        when the bundle has no verified router, and predicts the rows of every cluster with the model of
+                        the cluster from the production bundle
+
+        Output      :   An array of predictions in the order of the rows is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Written by  :   iNeuron Intelligence
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.predict_rows.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            clusters = router.predict(data.to_numpy())
+
+            pred = None
+
+            for i in unique(clusters):
+                rows = flatnonzero(clusters == i)
+
+                model_entry = self.find_correct_model_file(
+                    i, bundle["manifest"], log_file
+                )
+
+                model = bundle["models"][model_entry["model_name"]]
+
+                cluster_pred = model.predict(data.iloc[rows])
+
+                if pred is None:
+                    pred = empty(len(data), dtype=cluster_pred.dtype)
+
+                pred[rows] = cluster_pred
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return pred
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
@@ -121,7 +278,10 @@ class Prediction:
     def predict_from_model(self):
         """
         Method Name :   predict_from_model
-        Description :   This method predicts the new data using the existing models
+        Description :   This method predicts the new data using the production models. All the models are loaded
+                        from the production bundle with a single get, and resolved from the manifest of the bundle.
+                        The bundle is only loaded when the production version has changed, and the rows are
+                        predicted through the prediction cache
 
         Output      :   Prediction file is created in input files bucket
         On Failure  :   Write an exception log and then raise an exception
@@ -143,51 +303,48 @@ class Prediction:
 
             data = self.preprocessor.replace_invalid_values(data)
 
-            is_null_present = self.preprocessor.is_null_present(data)
-
-            if is_null_present:
-                data = self.preprocessor.impute_missing_values(data)
-
-            kmeans = self.s3.load_model("KMeans", self.model_bucket, self.pred_log,)
+            self.preprocessor.is_null_present(data)
 
-            clusters = kmeans.predict(data.drop(["clusters"], axis=1))
+            manifest, version = self.get_prod_manifest(self.model_bucket, self.pred_log)
 
-            data["clusters"] = clusters
+            bundle, router = self.prediction_cache.get_bundle(version)
 
-            clusters = data["clusters"].unique()
+            if bundle is None:
+                bundle = self.get_prod_bundle(
+                    manifest, self.model_bucket, self.pred_log
+                )
 
-            for i in clusters:
-                cluster_data = data[data["clusters"] == i]
+                if bundle["cluster_centers"] is not None:
+                    router = Cluster_Router(bundle["cluster_centers"], self.pred_log)
 
-                phising_names = list(cluster_data["phising"])
+                else:
+                    router = bundle["kmeans"]
 
-                cluster_data = data.drop(labels=["phising"], axis=1)
+                self.prediction_cache.set_bundle(version, bundle, router)
 
-                cluster_data = cluster_data.drop(["clusters"], axis=1)
+            self.check_schema(data, bundle, manifest, self.pred_log)
 
-                crt_model_name = self.find_correct_model_file(
-                    i, self.model_bucket, self.pred_log,
-                )
+            data = self.preprocessor.impute_missing_values(data, bundle["imputer"])
 
-                model = self.s3.load_model(
-                    crt_model_name, self.prod_model_dir, self.pred_log
-                )
+            pred = self.prediction_cache.predict(
+                data,
+                lambda rows: self.predict_rows(rows, bundle, router, self.pred_log),
+                version,
+            )
 
-                result = list(model.predict(cluster_data))
+            result = Series(pred, index=data.index).sort_index().to_frame("prediction")
 
-                result = DataFrame(
-                    list(zip(phising_names, result)), columns=["phising", "prediction"]
-                )
+            self.s3.upload_df_as_csv(
+                result,
+                self.pred_output_file,
+                self.pred_output_file,
+                self.input_files_bucket,
+                self.pred_log,
+            )
 
-                self.s3.upload_df_as_csv(
-                    result,
-                    self.pred_output_file,
-                    self.pred_output_file,
-                    self.input_files_bucket,
-                    self.pred_log,
-                )
+            self.preprocessor.wait_for_null_report()
 
-            self.log_writer.log(self.pred_log, "End of Prediction")
+            self.log_writer.log("End of Prediction", self.pred_log)
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.pred_log,
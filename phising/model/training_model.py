@@ -1,3 +1,4 @@
+from mlflow import start_run
 from phising.data_ingestion.data_loader_train import Data_Getter_Train
 from phising.data_preprocessing.clustering import KMeans_Clustering
 from phising.data_preprocessing.preprocessing import Preprocessor
@@ -11,7 +12,8 @@ from utils.read_params import read_params
 class Train_Model:
     """
     Description :   This method is used for getting the data and applying
-                    some preprocessing steps and then train the models and register them in mlflow
+                    some preprocessing steps and then train the models and register them in mlflow.
+                    The training session is logged as one parent run with a nested run per cluster
     Written by  :   iNeuron Intelligence
     
     Version     :   1.2
@@ -23,9 +25,15 @@ class Train_Model:
 
         self.config = read_params()
 
-        self.model_train_log = self.config["train_db_log"]["train_model"]
+        self.model_train_log = self.config["train_db_log"]["model_training"]
 
-        self.target_col = self.config["target_col"]
+        self.target_col = self.config["base"]["target_col"]
+
+        self.exp_name = self.config["mlflow_config"]["experiment_name"]
+
+        self.run_name = self.config["mlflow_config"]["run_name"]
+
+        self.session_run_id = None
 
         self.class_name = self.__class__.__name__
 
@@ -65,45 +73,68 @@ class Train_Model:
 
             data = self.preprocessor.replace_invalid_values(data)
 
-            is_null_present = self.preprocessor.is_null_present(X)
-
-            if is_null_present:
-                data = self.preprocessor.impute_missing_values(X)
-
             X, Y = self.preprocessor.separate_label_feature(
                 data, label_col_name=self.target_col
             )
 
-            number_of_clusters = self.kmeans_op.elbow_plot(X)
+            self.preprocessor.is_null_present(X)
+
+            self.preprocessor.fit_imputer(X, self.preprocessor.null_profile)
+
+            X = self.preprocessor.impute_missing_values(X)
+
+            number_of_clusters = self.kmeans_op.draw_elbow_plot(X, labels=Y)
 
             X, kmeans_model = self.kmeans_op.create_clusters(
-                data=X, number_of_clusters=number_of_clusters
+                data=X, num_clusters=number_of_clusters, labels=Y
             )
 
             X["Labels"] = Y
 
             list_of_clusters = X["Cluster"].unique()
 
-            for i in list_of_clusters:
-                cluster_data = X[X["Cluster"] == i]
-
-                cluster_features = cluster_data.drop(["Labels", "Cluster"], axis=1)
+            self.mlflow_op.start_mlflow_session(self.exp_name)
 
-                cluster_label = cluster_data["Labels"]
+            with start_run(
+                run_name=self.run_name, tags={"run_type": "session"}
+            ) as session_run:
+                self.session_run_id = session_run.info.run_id
 
                 self.log_writer.log(
-                    "Seprated cluster features and cluster label for the cluster data",
+                    f"Started {self.session_run_id} run for the training session",
                     self.model_train_log,
                 )
 
-                self.model_utils.train_and_log_models(
-                    cluster_features,
-                    cluster_label,
-                    self.model_train_log,
-                    idx=i,
-                    kmeans=kmeans_model,
+                self.mlflow_op.log_all_for_model(
+                    kmeans_model, None, run_id=self.session_run_id
                 )
 
+                for i in list_of_clusters:
+                    cluster_data = X[X["Cluster"] == i]
+
+                    cluster_features = cluster_data.drop(["Labels", "Cluster"], axis=1)
+
+                    cluster_label = cluster_data["Labels"]
+
+                    self.log_writer.log(
+                        "Seprated cluster features and cluster label for the cluster data",
+                        self.model_train_log,
+                    )
+
+                    self.model_utils.train_and_log_models(
+                        cluster_features,
+                        cluster_label,
+                        self.model_train_log,
+                        self.mlflow_op,
+                        idx=i,
+                    )
+
+                self.mlflow_op.wait_for_model_logs()
+
+            self.kmeans_op.save_elbow_plot()
+
+            self.preprocessor.wait_for_null_report()
+
             self.log_writer.log("Successful End of Training", self.model_train_log)
 
             self.log_writer.start_log(
@@ -0,0 +1,526 @@
+from json import load
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from numpy import (
+    arange,
+    argmax,
+    array_equal,
+    asarray,
+    ceil,
+    clip,
+    concatenate,
+    empty,
+    exp,
+    float32,
+    float64,
+    floor,
+    full,
+    int8,
+    int32,
+    isnan,
+    log,
+    where,
+    zeros,
+)
+from numpy.random import default_rng
+from pandas import DataFrame
+from utils.logger import App_Logger
+from utils.read_params import read_params
+
+
+class Flat_Ensemble:
+    """
+    Description :   This class is a tree ensemble flattened into contiguous node arrays, which scores a batch over all
+                    the trees at once. The leaf nodes point to themselves, so every row is walked for max_depth steps
+                    without any mask. When all the features are ternary, the split thresholds are replaced by int8
+                    cut points, since for x in {-1, 0, 1} the split is the same as x <= cut.
+
+                    For kind rf, the split is x <= threshold on float32 features, and the class probabilities of the
+                    trees are summed in tree order and divided by the number of trees, as RandomForestClassifier does.
+                    For kind xgb, the split is x < threshold with missing values sent to the default child, and the
+                    leaf values are summed in float32 in tree order from the base margin, as XGBoost does
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        trees: list,
+        classes,
+        block_size: int,
+        base_margin: float = 0.0,
+    ):
+        self.kind = kind
+
+        self.classes_ = asarray(classes)
+
+        self.block_size = block_size
+
+        self.n_trees = len(trees)
+
+        self.base_margin = float32(base_margin)
+
+        offsets = [0]
+
+        for tree in trees[:-1]:
+            offsets.append(offsets[-1] + len(tree["feature"]))
+
+        self.roots = asarray(offsets, dtype=int32)
+
+        is_leaf = concatenate([tree["left"] == -1 for tree in trees])
+
+        node_ids = arange(len(is_leaf), dtype=int32)
+
+        self.left = where(
+            is_leaf,
+            node_ids,
+            concatenate([tree["left"] + off for tree, off in zip(trees, offsets)]),
+        ).astype(int32)
+
+        self.right = where(
+            is_leaf,
+            node_ids,
+            concatenate([tree["right"] + off for tree, off in zip(trees, offsets)]),
+        ).astype(int32)
+
+        self.feature = where(
+            is_leaf, 0, concatenate([tree["feature"] for tree in trees])
+        ).astype(int32)
+
+        threshold_dtype = float64 if kind == "rf" else float32
+
+        self.threshold = concatenate([tree["threshold"] for tree in trees]).astype(
+            threshold_dtype
+        )
+
+        self.default_left = concatenate(
+            [tree.get("default_left", tree["left"] == -1) for tree in trees]
+        ).astype(bool)
+
+        self.leaf_value = concatenate([tree["value"] for tree in trees])
+
+        cut = floor(self.threshold) if kind == "rf" else ceil(self.threshold) - 1
+
+        self.cut = clip(where(is_leaf, 0, cut), -2, 1).astype(int8)
+
+        self.max_depth = max(tree["max_depth"] for tree in trees)
+
+        self.model = None
+
+        self.max_flat_rows = None
+
+    def set_fallback_model(self, model, max_flat_rows: int):
+        """
+        Method Name :   set_fallback_model
+        Description :   This method sets the model which the ensemble was flattened from, the batches of more than
+                        max_flat_rows rows are predicted with the model, since it is faster on large batches
+
+        Output      :   The fallback model is set
+        On Failure  :   Raise an exception
+        """
+        self.model = model
+
+        self.max_flat_rows = max_flat_rows
+
+    def is_ternary(self, X):
+        return bool(((X == -1) | (X == 0) | (X == 1)).all())
+
+    def apply(self, X):
+        """
+        Method Name :   apply
+        Description :   This method gets the leaf node of every tree for every row of the block
+
+        Output      :   An array of shape (rows, trees) with the leaf node ids is returned
+        On Failure  :   Raise an exception
+        """
+        ternary = self.is_ternary(X)
+
+        values = X.astype(int8) if ternary else X
+
+        flat_values = values.ravel()
+
+        row_offsets = (arange(X.shape[0], dtype=int32) * X.shape[1])[:, None]
+
+        node = empty((X.shape[0], self.n_trees), dtype=int32)
+
+        node[:] = self.roots
+
+        for _ in range(self.max_depth):
+            x = flat_values.take(row_offsets + self.feature.take(node))
+
+            if ternary:
+                go_left = x <= self.cut.take(node)
+
+            elif self.kind == "rf":
+                go_left = x <= self.threshold.take(node)
+
+            else:
+                go_left = where(
+                    isnan(x),
+                    self.default_left.take(node),
+                    x < self.threshold.take(node),
+                )
+
+            node = where(go_left, self.left.take(node), self.right.take(node))
+
+        return node
+
+    def predict_block(self, X):
+        node = self.apply(X)
+
+        if self.kind == "rf":
+            proba = zeros((X.shape[0], self.leaf_value.shape[1]), dtype=float64)
+
+            for t in range(self.n_trees):
+                proba += self.leaf_value.take(node[:, t], axis=0)
+
+            proba /= self.n_trees
+
+            return self.classes_.take(argmax(proba, axis=1), axis=0)
+
+        margin = full(X.shape[0], self.base_margin, dtype=float32)
+
+        for t in range(self.n_trees):
+            margin += self.leaf_value.take(node[:, t])
+
+        one = float32(1.0)
+
+        proba = one / (one + exp(-margin))
+
+        return self.classes_.take((proba > 0.5).astype(int32), axis=0)
+
+    def predict(self, X):
+        """
+        Method Name :   predict
+        Description :   This method predicts the classes of the rows with the flattened ensemble, or with the fallback
+                        model when the batch has more than max_flat_rows rows
+
+        Output      :   An array of predicted classes is returned
+        On Failure  :   Raise an exception
+        """
+        if self.model is not None and len(X) > self.max_flat_rows:
+            return self.model.predict(X)
+
+        return self.predict_flat(X)
+
+    def predict_flat(self, X):
+        """
+        Method Name :   predict_flat
+        Description :   This method predicts the classes of the rows with the flattened ensemble, the rows are scored
+                        in blocks of block_size
+
+        Output      :   An array of predicted classes is returned
+        On Failure  :   Raise an exception
+        """
+        X = asarray(X, dtype=float32)
+
+        if X.shape[0] == 0:
+            return self.classes_[:0]
+
+        return concatenate(
+            [
+                self.predict_block(X[start : start + self.block_size])
+                for start in range(0, X.shape[0], self.block_size)
+            ]
+        )
+
+
+class Tree_Exporter:
+    """
+    Description :   This class is used for flattening the production RandomForest and XGBoost classifiers into
+                    Flat_Ensemble objects. A flattened model is only used when its predictions are identical to the
+                    predictions of the original model on the verification rows
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, log_file):
+        self.config = read_params()
+
+        self.class_name = self.__class__.__name__
+
+        self.log_writer = App_Logger()
+
+        self.log_file = log_file
+
+        self.ensemble_params = self.config["tree_ensemble"]
+
+    def flatten_random_forest(self, model):
+        """
+        Method Name :   flatten_random_forest
+        Description :   This method flattens the trees of RandomForestClassifier, the leaf values are the class
+                        probabilities of the tree, normalized as DecisionTreeClassifier.predict_proba does
+
+        Output      :   A Flat_Ensemble of kind rf is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.flatten_random_forest.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            n_classes = len(model.classes_)
+
+            trees = []
+
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+
+                value = tree.value[:, 0, :n_classes].astype(float64)
+
+                normalizer = value.sum(axis=1)[:, None]
+
+                normalizer[normalizer == 0.0] = 1.0
+
+                trees.append(
+                    {
+                        "feature": tree.feature,
+                        "threshold": tree.threshold,
+                        "left": tree.children_left,
+                        "right": tree.children_right,
+                        "value": value / normalizer,
+                        "max_depth": tree.max_depth,
+                    }
+                )
+
+            flat_model = Flat_Ensemble(
+                "rf",
+                trees,
+                model.classes_,
+                self.ensemble_params["block_size"],
+            )
+
+            self.log_writer.log(
+                f"Flattened {len(trees)} trees of {model.__class__.__name__}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return flat_model
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def flatten_xgboost(self, model):
+        """
+        Method Name :   flatten_xgboost
+        Description :   This method flattens the trees of XGBClassifier with binary:logistic objective, the trees are
+                        read from the json model of the booster, in which the leaf values are stored as the split
+                        conditions of the leaf nodes
+
+        Output      :   A Flat_Ensemble of kind xgb is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.flatten_xgboost.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            with TemporaryDirectory() as tmp_dir:
+                model_file = join(tmp_dir, "model.json")
+
+                model.get_booster().save_model(model_file)
+
+                with open(model_file) as f:
+                    learner = load(f)["learner"]
+
+            objective = learner["objective"]["name"]
+
+            booster = learner["gradient_booster"]
+
+            if objective != "binary:logistic" or booster["name"] != "gbtree":
+                raise ValueError(
+                    f"{booster['name']} booster with {objective} objective can not be flattened"
+                )
+
+            trees = []
+
+            for tree in booster["model"]["trees"]:
+                left = asarray(tree["left_children"], dtype=int32)
+
+                right = asarray(tree["right_children"], dtype=int32)
+
+                split_conditions = asarray(tree["split_conditions"], dtype=float32)
+
+                depth = zeros(len(left), dtype=int32)
+
+                for node in range(len(left)):
+                    if left[node] != -1:
+                        depth[left[node]] = depth[node] + 1
+
+                        depth[right[node]] = depth[node] + 1
+
+                trees.append(
+                    {
+                        "feature": asarray(tree["split_indices"], dtype=int32),
+                        "threshold": split_conditions,
+                        "left": left,
+                        "right": right,
+                        "default_left": asarray(tree["default_left"], dtype=bool),
+                        "value": where(left == -1, split_conditions, float32(0.0)),
+                        "max_depth": int(depth.max()),
+                    }
+                )
+
+            ## Newer XGBoost versions write base_score as a vector like "[3.94E-1]", only a single base score
+            ## is valid for binary:logistic
+
+            base_score = str(learner["learner_model_param"]["base_score"]).strip("[]")
+
+            base_score = float32(float(base_score))
+
+            base_margin = -log(float32(1.0) / base_score - float32(1.0))
+
+            classes = model.classes_ if hasattr(model, "_le") else arange(2)
+
+            flat_model = Flat_Ensemble(
+                "xgb",
+                trees,
+                classes,
+                self.ensemble_params["block_size"],
+                base_margin=base_margin,
+            )
+
+            self.log_writer.log(
+                f"Flattened {len(trees)} trees of {model.__class__.__name__}",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return flat_model
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_verify_rows(self, columns: list):
+        """
+        Method Name :   get_verify_rows
+        Description :   This method gets the verification rows, which are verify_samples ternary rows for the int8
+                        path and the same number of rows with fractional values, as left by the imputer, for the
+                        threshold path
+
+        Output      :   A dataframe of verification rows with the feature columns is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_verify_rows.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            rng = default_rng(self.ensemble_params["seed"])
+
+            n_rows = self.ensemble_params["verify_samples"]
+
+            shape = (n_rows, len(columns))
+
+            ternary_rows = rng.integers(-1, 2, size=shape)
+
+            fractional_rows = ternary_rows + rng.uniform(-0.5, 0.5, size=shape)
+
+            rows = DataFrame(
+                concatenate([ternary_rows, fractional_rows]).astype(float64),
+                columns=columns,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return rows
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def export_model(self, model, columns: list):
+        """
+        Method Name :   export_model
+        Description :   This method flattens the model when it is a RandomForestClassifier or an XGBClassifier, and
+                        checks the predictions of the flattened model against the model on the verification rows
+                        of the feature columns. The flattened model keeps the model for the batches of more than
+                        max_flat_rows rows
+
+        Output      :   The flattened model is returned, or the model itself when it can not be flattened or the
+                        predictions are not identical
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.export_model.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            model_name = model.__class__.__name__
+
+            flat_model = None
+
+            try:
+                if model_name == "RandomForestClassifier":
+                    flat_model = self.flatten_random_forest(model)
+
+                elif model_name == "XGBClassifier":
+                    flat_model = self.flatten_xgboost(model)
+
+            except Exception as e:
+                self.log_writer.warning_log(
+                    f"Could not flatten {model_name}, serving the original model, error : {e}",
+                    self.log_file,
+                )
+
+            if flat_model is not None:
+                rows = self.get_verify_rows(columns)
+
+                if not array_equal(flat_model.predict_flat(rows), model.predict(rows)):
+                    self.log_writer.warning_log(
+                        f"Flattened {model_name} predictions are not identical, serving the original model",
+                        self.log_file,
+                    )
+
+                    flat_model = None
+
+                else:
+                    flat_model.set_fallback_model(
+                        model, self.ensemble_params["max_flat_rows"]
+                    )
+
+            self.log_writer.log(
+                f"Exported {model_name} as {'flattened' if flat_model is not None else 'original'} model",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return model if flat_model is None else flat_model
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
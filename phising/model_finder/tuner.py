@@ -112,7 +112,7 @@ class Model_Finder:
             )
 
             self.log_writer.log(
-                f"{self.rf_model_name} model best params are {self.rf_best_params}",
+                f"{self.xgb_model_name} model best params are {self.xgb_best_params}",
                 self.log_file,
             )
 
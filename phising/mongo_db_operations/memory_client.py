@@ -0,0 +1,94 @@
+from copy import deepcopy
+from itertools import count
+from threading import Lock
+
+
+class Memory_Collection:
+    """
+    Description :   This class is an in-memory stand-in for a MongoDB collection, supporting the operations
+                    used by MongoDB_Operation
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self.documents = []
+
+        self.ids = count()
+
+        self.lock = Lock()
+
+    def insert_many(self, documents):
+        with self.lock:
+            for document in documents:
+                document = dict(document)
+
+                document.setdefault("_id", next(self.ids))
+
+                self.documents.append(document)
+
+    def find(self):
+        with self.lock:
+            return iter(deepcopy(self.documents))
+
+    def count_documents(self, filter: dict = None):
+        return len(self.documents)
+
+    def drop(self):
+        with self.lock:
+            self.documents.clear()
+
+
+class Memory_Database:
+    """
+    Description :   This class is an in-memory stand-in for a MongoDB database
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+        self.collections = {}
+
+        self.lock = Lock()
+
+    def get_collection(self, name: str):
+        with self.lock:
+            if name not in self.collections:
+                self.collections[name] = Memory_Collection(name)
+
+            return self.collections[name]
+
+    def __getitem__(self, name: str):
+        return self.get_collection(name)
+
+
+class Memory_Client:
+    """
+    Description :   This class is an in-memory stand-in for MongoClient, the databases are shared by all the clients
+                    in the process, so that every stage of the pipeline sees the same collections
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    databases = {}
+
+    lock = Lock()
+
+    def __getitem__(self, name: str):
+        with self.lock:
+            if name not in self.databases:
+                self.databases[name] = Memory_Database(name)
+
+            return self.databases[name]
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.databases.clear()
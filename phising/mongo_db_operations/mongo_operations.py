@@ -2,14 +2,15 @@ from json import loads
 from os import environ
 
 from pandas import DataFrame
-from pymongo import MongoClient
+from phising.mongo_db_operations.memory_client import Memory_Client
 from utils.logger import App_Logger
 from utils.read_params import read_params
 
 
 class MongoDB_Operation:
     """
-    Description :   This method is used for all mongodb operations
+    Description :   This method is used for all mongodb operations. The client is MongoClient, or the in-memory
+                    stand-in when the backend in mongodb params is memory
     Written by  :   iNeuron Intelligence
     
     Version     :   1.2
@@ -21,9 +22,15 @@ class MongoDB_Operation:
 
         self.class_name = self.__class__.__name__
 
-        self.DB_URL = environ["MONGODB_URL"]
+        if self.config["mongodb"]["backend"] == "memory":
+            self.client = Memory_Client()
 
-        self.client = MongoClient(self.DB_URL)
+        else:
+            from pymongo import MongoClient
+
+            self.DB_URL = environ["MONGODB_URL"]
+
+            self.client = MongoClient(self.DB_URL)
 
         self.log_writer = App_Logger()
 
@@ -0,0 +1,90 @@
+from re import compile
+
+from utils.logger import App_Logger
+
+
+class File_Name_Validator:
+    """
+    Description :   This class is used for validating the raw batch file names, for both training and prediction
+    
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud 
+    """
+
+    def __init__(
+        self,
+        regex: str,
+        LengthOfDateStampInFile: int,
+        LengthOfTimeStampInFile: int,
+        log_file,
+    ):
+        self.log_file = log_file
+
+        self.log_writer = App_Logger()
+
+        self.class_name = self.__class__.__name__
+
+        self.file_name_pattern = compile(regex)
+
+        self.stamp_pattern = compile(
+            r"^[^_]*_(?P<date>[^_]{%d})_(?P<time>[^_]{%d})(?:_|\.csv|$)"
+            % (LengthOfDateStampInFile, LengthOfTimeStampInFile)
+        )
+
+    def is_valid_file_name(self, fname: str):
+        """
+        Method Name :   is_valid_file_name
+        Description :   This method checks the file name against the regex pattern, and the date and time stamps
+                        against their lengths in the schema
+
+        Output      :   True if the file name is valid, else False
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        return (
+            self.file_name_pattern.match(fname) is not None
+            and self.stamp_pattern.match(fname) is not None
+        )
+
+    def partition_file_names(self, fnames: list):
+        """
+        Method Name :   partition_file_names
+        Description :   This method partitions the file names into good and bad file names in one pass
+
+        Output      :   A tuple of good file names and bad file names
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.partition_file_names.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            good_fnames, bad_fnames = [], []
+
+            for fname in fnames:
+                if self.is_valid_file_name(fname):
+                    good_fnames.append(fname)
+
+                else:
+                    bad_fnames.append(fname)
+
+            self.log_writer.log(
+                f"Validated {len(fnames)} file names, {len(good_fnames)} are good and {len(bad_fnames)} are bad",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return good_fnames, bad_fnames
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
@@ -1,8 +1,11 @@
-from re import match, split
+from json import loads as json_loads
 
+from phising.raw_data_validation.file_name_validation import File_Name_Validator
 from phising.s3_bucket_operations.s3_operations import S3_Operation
+from utils.cache_utils import Control_File_Cache
 from utils.logger import App_Logger
 from utils.read_params import read_params
+from utils.schema_utils import Schema_Utils
 
 
 class Raw_Train_Data_Validation:
@@ -35,6 +38,8 @@ class Raw_Train_Data_Validation:
 
         self.regex_file = self.config["regex_file"]
 
+        self.na_values = self.config["missing_values"]["na_values"]
+
         self.train_schema_log = self.config["train_db_log"]["values_from_schema"]
 
         self.good_train_data_dir = self.config["data"]["train"]["good"]
@@ -51,10 +56,12 @@ class Raw_Train_Data_Validation:
             "missing_values_in_col"
         ]
 
+        self.file_headers = {}
+
     def values_from_schema(self):
         """
         Method Name :   values_from_schema
-        Description :   This method gets schema values from the schema_training.json file
+        Description :   This method gets schema values from the cached schema_training.json file
 
         Output      :   Schema values are extracted from the schema_training.json file
         On Failure  :   Write an exception log and then raise an exception
@@ -69,8 +76,8 @@ class Raw_Train_Data_Validation:
                 "start", self.class_name, method_name, self.train_schema_log,
             )
 
-            dic = self.s3.read_json(
-                self.train_schema_file, self.input_files_bucket, self.train_schema_log,
+            dic = Control_File_Cache(self.train_schema_log, self.s3).get(
+                self.train_schema_file, self.input_files_bucket, json_loads
             )
 
             LengthOfDateStampInFile = dic["LengthOfDateStampInFile"]
@@ -90,9 +97,7 @@ class Raw_Train_Data_Validation:
                 + "\n"
             )
 
-            self.log_writer.log(
-                self.train_schema_log, message,
-            )
+            self.log_writer.log(message, self.train_schema_log)
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.train_schema_log,
@@ -113,7 +118,7 @@ class Raw_Train_Data_Validation:
     def get_regex_pattern(self):
         """
         Method Name :   get_regex_pattern
-        Description :   This method gets regex pattern from input files s3 bucket
+        Description :   This method gets regex pattern from input files s3 bucket, through the control file cache
 
         Output      :   A regex pattern is extracted
         On Failure  :   Write an exception log and then raise an exception
@@ -128,8 +133,8 @@ class Raw_Train_Data_Validation:
                 "start", self.class_name, method_name, self.train_gen_log,
             )
 
-            regex = self.s3.read_text(
-                self.regex_file, self.input_files_bucket, self.train_gen_log,
+            regex = Control_File_Cache(self.train_gen_log, self.s3).get(
+                self.regex_file, self.input_files_bucket, bytes.decode
             )
 
             self.log_writer.log(f"Got {regex} pattern", self.train_gen_log)
@@ -181,7 +186,7 @@ class Raw_Train_Data_Validation:
         Method Name :   validate_raw_file_name
         Description :   This method validates the raw file name based on regex pattern and schema values
 
-        Output      :   Raw file names are validated, good file names are stored in good data folder and rest is stored in bad data
+        Output      :   Raw file names are validated in one pass, good files are copied to good data folder and rest are copied to bad data folder
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -197,68 +202,48 @@ class Raw_Train_Data_Validation:
             self.create_dirs_for_good_bad_data(self.train_name_valid_log)
 
             onlyfiles = self.s3.get_files_from_folder(
-                self.raw_data_bucket,
                 self.raw_train_data_dir,
+                self.raw_data_bucket,
                 self.train_name_valid_log,
             )
 
-            train_batch_files = [f.split("/")[1] for f in onlyfiles]
+            train_batch_files = [
+                f.split("/")[-1] for f in onlyfiles if f.split("/")[-1] != ""
+            ]
 
             self.log_writer.log(
                 "Got training files with absolute file name", self.train_name_valid_log
             )
 
-            for fname in train_batch_files:
-                raw_data_train_file_name = self.raw_train_data_dir + "/" + fname
-
-                good_data_train_file_name = self.good_train_data_dir + "/" + fname
+            validator = File_Name_Validator(
+                regex,
+                LengthOfDateStampInFile,
+                LengthOfTimeStampInFile,
+                self.train_name_valid_log,
+            )
 
-                bad_data_train_file_name = self.bad_train_data_dir + "/" + fname
+            good_fnames, bad_fnames = validator.partition_file_names(train_batch_files)
 
-                self.log_writer.log(
-                    "Created raw,good and bad data file name", self.train_name_valid_log
+            files = [
+                (
+                    self.raw_train_data_dir + "/" + fname,
+                    self.good_train_data_dir + "/" + fname,
                 )
+                for fname in good_fnames
+            ] + [
+                (
+                    self.raw_train_data_dir + "/" + fname,
+                    self.bad_train_data_dir + "/" + fname,
+                )
+                for fname in bad_fnames
+            ]
 
-                if match(regex, fname):
-                    splitAtDot = split(".csv", fname)
-
-                    splitAtDot = split("_", splitAtDot[0])
-
-                    if len(splitAtDot[1]) == LengthOfDateStampInFile:
-                        if len(splitAtDot[2]) == LengthOfTimeStampInFile:
-                            self.s3.copy_data(
-                                raw_data_train_file_name,
-                                self.train_data_bucket,
-                                good_data_train_file_name,
-                                self.train_data_bucket,
-                                self.train_name_valid_log,
-                            )
-
-                        else:
-                            self.s3.copy_data(
-                                raw_data_train_file_name,
-                                self.train_data_bucket,
-                                bad_data_train_file_name,
-                                self.train_data_bucket,
-                                self.train_name_valid_log,
-                            )
-
-                    else:
-                        self.s3.copy_data(
-                            raw_data_train_file_name,
-                            self.train_data_bucket,
-                            bad_data_train_file_name,
-                            self.train_data_bucket,
-                            self.train_name_valid_log,
-                        )
-                else:
-                    self.s3.copy_data(
-                        raw_data_train_file_name,
-                        self.train_data_bucket,
-                        bad_data_train_file_name,
-                        self.train_data_bucket,
-                        self.train_name_valid_log,
-                    )
+            self.s3.copy_files(
+                files,
+                self.raw_data_bucket,
+                self.train_data_bucket,
+                self.train_name_valid_log,
+            )
 
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.train_name_valid_log,
@@ -269,12 +254,15 @@ class Raw_Train_Data_Validation:
                 e, self.class_name, method_name, self.train_name_valid_log,
             )
 
-    def validate_col_length(self, NumberofColumns: int):
+    def validate_col_length(self, NumberofColumns: int, column_names: dict = None):
         """
         Method Name :   validate_col_length
-        Description :   This method validates the column length based on number of columns as mentioned in schema values
+        Description :   This method validates the column length based on number of columns as mentioned in schema values.
+                        Only the header row of each file is fetched with a ranged get, and when column names are given,
+                        the header is also checked against the column names from schema. The headers of the valid
+                        files are kept for validate_missing_values_in_col
 
-        Output      :   The files' columns length are validated and good data is stored in good data folder and rest is stored in bad data folder
+        Output      :   The files' columns length and names are validated and the files which fail are moved to bad data folder
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -287,25 +275,29 @@ class Raw_Train_Data_Validation:
         )
 
         try:
-            lst = self.s3.read_csv_from_folder(
+            files = self.s3.get_files_from_folder(
                 self.good_train_data_dir,
                 self.train_data_bucket,
                 self.train_col_valid_log,
             )
 
-            for idx, f in enumerate(lst):
-                df = f[idx][0]
-
-                file = f[idx][1]
+            expected_cols = None if column_names is None else list(column_names)
 
-                abs_f = f[idx][2]
+            bad_files = 0
 
+            for file in files:
                 if file.endswith(".csv"):
-                    if df.shape[1] == NumberofColumns:
-                        pass
+                    cols = self.s3.read_header(
+                        file, self.train_data_bucket, self.train_col_valid_log
+                    )
+
+                    if len(cols) == NumberofColumns and (
+                        expected_cols is None or cols == expected_cols
+                    ):
+                        self.file_headers[file] = cols
 
                     else:
-                        dest_f = self.bad_train_data_dir + "/" + abs_f
+                        dest_f = self.bad_train_data_dir + "/" + file.split("/")[-1]
 
                         self.s3.move_data(
                             file,
@@ -315,9 +307,16 @@ class Raw_Train_Data_Validation:
                             self.train_col_valid_log,
                         )
 
+                        bad_files += 1
+
                 else:
                     pass
 
+            self.log_writer.log(
+                f"Validated column length of {len(files)} files from header, moved {bad_files} files to bad data folder",
+                self.train_col_valid_log,
+            )
+
             self.log_writer.start_log(
                 "exit", self.class_name, method_name, self.train_col_valid_log,
             )
@@ -327,12 +326,14 @@ class Raw_Train_Data_Validation:
                 e, self.class_name, method_name, self.train_col_valid_log,
             )
 
-    def validate_missing_values_in_col(self):
+    def validate_missing_values_in_col(self, column_names: dict = None):
         """
         Method Name :   validate_missing_values_in_col
-        Description :   This method validates the missing values in columns
+        Description :   This method validates the missing values in columns. When column names are given, the files
+                        are parsed as typed dataframes with the read_csv kwargs built from schema, and the headers read
+                        by validate_col_length are reused instead of being fetched again
 
-        Output      :   Missing columns are validated, and good data is stored in good data folder and rest is to stored in bad data folder
+        Output      :   Missing columns are validated, files with a column having only missing values are moved to bad data folder
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -345,44 +346,31 @@ class Raw_Train_Data_Validation:
         )
 
         try:
-            lst = self.s3.read_csv_from_folder(
-                self.good_train_data_dir,
-                self.train_data_bucket,
-                self.train_missing_value_log,
-            )
-
-            for idx, f in lst:
-                df = f[idx][0]
-
-                file = f[idx][1]
+            if column_names is None:
+                lst = self.s3.read_csv_from_folder(
+                    self.good_train_data_dir,
+                    self.train_data_bucket,
+                    self.train_missing_value_log,
+                    na_values=self.na_values,
+                )
 
-                abs_f = f[idx][2]
+            else:
+                lst = Schema_Utils(self.train_missing_value_log).read_csv_from_folder(
+                    self.good_train_data_dir,
+                    self.train_data_bucket,
+                    column_names,
+                    headers=self.file_headers,
+                    bad_dir=self.bad_train_data_dir,
+                )
 
+            for df, file, abs_f in lst:
                 if abs_f.endswith(".csv"):
-                    count = 0
-
-                    for cols in df:
-                        if (len(df[cols]) - df[cols].count()) == len(df[cols]):
-                            count += 1
-
-                            dest_f = self.bad_train_data_dir + "/" + abs_f
-
-                            self.s3.move_data(
-                                file,
-                                self.train_data_bucket,
-                                dest_f,
-                                self.train_data_bucket,
-                                self.train_missing_value_log,
-                            )
-
-                            break
-
-                    if count == 0:
-                        dest_f = self.good_train_data_dir + "/" + abs_f
+                    if df.isna().all(axis=0).any():
+                        dest_f = self.bad_train_data_dir + "/" + abs_f
 
-                        self.s3.upload_df_as_csv(
-                            df,
-                            abs_f,
+                        self.s3.move_data(
+                            file,
+                            self.train_data_bucket,
                             dest_f,
                             self.train_data_bucket,
                             self.train_missing_value_log,
@@ -391,9 +379,9 @@ class Raw_Train_Data_Validation:
                 else:
                     pass
 
-                self.log_writer.start_log(
-                    "exit", self.class_name, method_name, self.train_missing_value_log,
-                )
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.train_missing_value_log,
+            )
 
         except Exception as e:
             self.log_writer.exception_log(
@@ -1,26 +1,35 @@
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from csv import reader as csv_reader
+from hashlib import sha256
+from io import BytesIO, StringIO
+from json import dumps as json_dumps
 from json import loads as json_loads
 from os import remove
-from pickle import dump
+from pickle import HIGHEST_PROTOCOL
+from pickle import dumps as pickle_dumps
 from pickle import loads as pickle_loads
+from threading import Lock
 
-from boto3 import client, resource
-from botocore.exceptions import ClientError
 from pandas import read_csv
+from phising.s3_bucket_operations.storage_backends import get_storage_backend
 from utils.logger import App_Logger
-from utils.model_utils import Model_Utils
 from utils.read_params import read_params
 
 
 class S3_Operation:
     """
-    Description :   This method is used for all the S3 bucket operations
+    Description :   This method is used for all the S3 bucket operations. The operations are done on the storage
+                    backend from storage params, which is s3, local or memory
     Written by  :   iNeuron Intelligence
     
     Version     :   1.2
     Revisions   :   Moved to setup to cloud 
     """
 
+    listing_cache = {}
+
+    listing_lock = Lock()
+
     def __init__(self):
         self.log_writer = App_Logger()
 
@@ -28,16 +37,25 @@ class S3_Operation:
 
         self.class_name = self.__class__.__name__
 
-        self.model_utils = Model_Utils()
+        self.file_format = self.config["model_save_format"]
+
+        self.bundle_magic = "phising-bundle"
 
-        self.file_format = self.config["model_utils"]["save_format"]
+        self.max_workers = self.config["s3_operations"]["max_workers"]
 
-        self.s3_client = client("s3")
+        self.header_bytes = self.config["s3_operations"]["header_bytes"]
 
-        self.s3_resource = resource("s3")
+        self.use_listing_cache = self.config["s3_operations"]["listing_cache"]
+
+        self.storage = get_storage_backend(self.config["storage"])
 
     def read_object(
-        self, object: object, log_file, decode: bool = True, make_readable: bool = False
+        self,
+        fname: str,
+        bucket: str,
+        log_file,
+        decode: bool = True,
+        make_readable: bool = False,
     ):
         """
         Method Name :   read_object
@@ -54,11 +72,9 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            func = (
-                lambda: object.get()["Body"].read().decode()
-                if decode is True
-                else object.get()["Body"].read()
-            )
+            content = self.storage.get(bucket, fname)[0]
+
+            func = lambda: content.decode() if decode is True else content
 
             self.log_writer.log(f"Read the s3 object with decode as {decode}", log_file)
 
@@ -91,9 +107,7 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            txt_obj = self.get_file_object(fname, bucket, log_file)
-
-            content = self.read_object(txt_obj, log_file)
+            content = self.read_object(fname, bucket, log_file)
 
             self.log_writer.log(
                 f"Read {fname} file as text from {bucket} bucket", log_file
@@ -122,13 +136,11 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            f_obj = self.get_file_object(fname, bucket, log_file)
-
-            json_content = self.read_object(f_obj, log_file)
+            json_content = self.read_object(fname, bucket, log_file)
 
             dic = json_loads(json_content)
 
-            self.log_writer.log(f"Read {fname} from {bucket} bucket",)
+            self.log_writer.log(f"Read {fname} from {bucket} bucket", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -137,10 +149,148 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def get_df_from_object(self, object: object, log_file):
+    def upload_object(self, content: bytes, fname: str, bucket: str, log_file):
+        """
+        Method Name :   upload_object
+        Description :   This method uploads the content from memory to s3 bucket without creating a local copy
+
+        Output      :   The content is uploaded to s3 bucket as fname
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.upload_object.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            self.storage.put(bucket, fname, content)
+
+            self.invalidate_listing_cache(bucket, fname)
+
+            self.log_writer.log(f"Uploaded {fname} to {bucket} bucket", log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def upload_json(self, dic: dict, fname: str, bucket: str, log_file):
+        """
+        Method Name :   upload_json
+        Description :   This method uploads a dictionary as json file to s3 bucket without creating a local copy
+
+        Output      :   A json file is uploaded to s3 bucket
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.upload_json.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            self.upload_object(json_dumps(dic).encode(), fname, bucket, log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def object_exists(self, fname: str, bucket: str, log_file):
+        """
+        Method Name :   object_exists
+        Description :   This method checks whether the exact key is present in s3 bucket, without listing the bucket
+
+        Output      :   True if the object is present, else False
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.object_exists.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            exists = self.storage.head(bucket, fname) is not None
+
+            self.log_writer.log(
+                f"{fname} exists in {bucket} bucket is {exists}", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return exists
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_etag(self, fname: str, bucket: str, log_file):
+        """
+        Method Name :   get_etag
+        Description :   This method gets the etag of the exact key in s3 bucket with a head request
+
+        Output      :   The etag of the object is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_etag.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            etag = self.storage.head(bucket, fname)
+
+            if etag is None:
+                raise FileNotFoundError(f"{fname} does not exist in {bucket} bucket")
+
+            self.log_writer.log(f"Got etag of {fname} from {bucket} bucket", log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return etag
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def read_object_with_etag(self, fname: str, bucket: str, log_file):
+        """
+        Method Name :   read_object_with_etag
+        Description :   This method reads the exact key from s3 bucket with a single get request, without listing the bucket
+
+        Output      :   A tuple of object content as bytes and the etag of the object is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_object_with_etag.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            content, etag = self.storage.get(bucket, fname)
+
+            self.log_writer.log(
+                f"Read {fname} with etag from {bucket} bucket", log_file
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return content, etag
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def get_df_from_object(self, fname: str, bucket: str, log_file, **read_csv_kwargs):
         """
         Method Name :   get_df_from_object
-        Description :   This method gets dataframe from object 
+        Description :   This method gets dataframe from object bytes, read_csv_kwargs are passed to pandas read_csv
 
         Output      :   Dataframe is read from the object
         On Failure  :   Write an exception log and then raise an exception
@@ -153,9 +303,9 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            content = self.read_object(object, make_readable=True)
+            content = self.read_object(fname, bucket, log_file, decode=False)
 
-            df = read_csv(content)
+            df = read_csv(BytesIO(content), **read_csv_kwargs)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -164,10 +314,10 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def read_csv(self, fname: str, bucket: str, log_file):
+    def read_csv(self, fname: str, bucket: str, log_file, **read_csv_kwargs):
         """
         Method Name :   read_csv
-        Description :   This method reads the csv data from s3 bucket
+        Description :   This method reads the csv data from s3 bucket, read_csv_kwargs are passed to pandas read_csv
 
         Output      :   A pandas series object consisting of runs for the particular experiment id
         On Failure  :   Write an exception log and then raise an exception
@@ -180,9 +330,7 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            csv_obj = self.get_file_object(fname, bucket, log_file)
-
-            df = self.get_df_from_object(csv_obj, log_file)
+            df = self.get_df_from_object(fname, bucket, log_file, **read_csv_kwargs)
 
             self.log_writer.log(f"Read {fname} csv file from {bucket} bucket", log_file)
 
@@ -193,10 +341,12 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def read_csv_from_folder(self, folder_name: str, bucket: str, log_file):
+    def read_csv_from_folder(
+        self, folder_name: str, bucket: str, log_file, **read_csv_kwargs
+    ):
         """
         Method Name :   read_csv_from_folder
-        Description :   This method reads the csv files from folder
+        Description :   This method reads the csv files from folder, read_csv_kwargs are passed to pandas read_csv
 
         Output      :   A list of tuple of dataframe, along with absolute file name and file name is returned
         On Failure  :   Write an exception log and then raise an exception
@@ -211,7 +361,12 @@ class S3_Operation:
             files = self.get_files_from_folder(folder_name, bucket, log_file)
 
             lst = [
-                (self.read_csv(f, bucket, log_file), f, f.split("/")[-1]) for f in files
+                (
+                    self.read_csv(f, bucket, log_file, **read_csv_kwargs),
+                    f,
+                    f.split("/")[-1],
+                )
+                for f in files
             ]
 
             self.log_writer.log(
@@ -226,12 +381,57 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def read_header(self, fname: str, bucket: str, log_file, header_bytes: int = None):
+        """
+        Method Name :   read_header
+        Description :   This method reads only the header row of a csv file, by fetching the first header_bytes of
+                        the object with a ranged get. The range is doubled until a complete line is read
+
+        Output      :   A list of column names of the csv file is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_header.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            header_bytes = self.header_bytes if header_bytes is None else header_bytes
+
+            while True:
+                content = self.storage.get(bucket, fname, (0, header_bytes - 1))[0]
+
+                if b"\n" in content or len(content) < header_bytes:
+                    break
+
+                header_bytes *= 2
+
+            header = content.split(b"\n", 1)[0].decode(errors="ignore")
+
+            cols = [
+                col.strip() for col in next(csv_reader([header.rstrip("\r")]), [])
+            ]
+
+            self.log_writer.log(
+                f"Read header of {fname} file from {bucket} bucket with {len(content)} bytes",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return cols
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
     def load_object(self, object, bucket: str, log_file):
         """
         Method Name :   load_object
-        Description :   This method loads the object from s3 bucket
+        Description :   This method loads the object metadata from s3 bucket
 
-        Output      :   An object is loaded from s3 bucket
+        Output      :   An object is loaded from s3 bucket, FileNotFoundError is raised when the object does not exist
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -242,7 +442,8 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.s3_resource.Object(bucket, object).load()
+            if self.storage.head(bucket, object) is None:
+                raise FileNotFoundError(f"{object} does not exist in {bucket} bucket")
 
             self.log_writer.log(f"Loaded {object} from {bucket} bucket", log_file)
 
@@ -267,14 +468,10 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.load_object(bucket, folder_name)
-
-            self.log_writer.log(f"Folder {folder_name} already exists", log_file)
+            if self.object_exists(folder_name + "/", bucket, log_file):
+                self.log_writer.log(f"Folder {folder_name} already exists", log_file)
 
-            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
-
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "404":
+            else:
                 self.log_writer.log(
                     f"{folder_name} folder does not exist,creating new one", log_file
                 )
@@ -285,12 +482,14 @@ class S3_Operation:
                     f"{folder_name} folder created in {bucket} bucket", log_file
                 )
 
-            else:
-                self.log_writer.log(
-                    f"Error occured in creating {folder_name} folder", log_file
-                )
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
-                self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+        except Exception as e:
+            self.log_writer.log(
+                f"Error occured in creating {folder_name} folder", log_file
+            )
+
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
     def put_object(self, object, bucket: str, log_file):
         """
@@ -308,7 +507,9 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.s3_client.put_object(Bucket=bucket, Key=(object + "/"))
+            self.storage.put(bucket, object + "/", b"")
+
+            self.invalidate_listing_cache(bucket, object + "/")
 
             self.log_writer.log(f"Created {object} folder in {bucket} bucket", log_file)
 
@@ -335,84 +536,109 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.log_writer.log(f"Uploading {from_fname} to s3 bucket {bucket}",)
+            self.log_writer.log(
+                f"Uploading {from_fname} to s3 bucket {bucket}", log_file
+            )
 
-            self.s3_resource.meta.client.upload_file(from_fname, bucket, to_file_name)
+            self.storage.upload_file(from_fname, bucket, to_file_name)
 
-            self.log_writer.log(f"Uploaded {from_fname} to s3 bucket {bucket}",)
+            self.invalidate_listing_cache(bucket, to_file_name)
+
+            self.log_writer.log(
+                f"Uploaded {from_fname} to s3 bucket {bucket}", log_file
+            )
 
             if delete is True:
                 self.log_writer.log(
-                    f"Option remove is set {delete}..deleting the file",
+                    f"Option remove is set {delete}..deleting the file", log_file
                 )
 
                 remove(from_fname)
 
                 self.log_writer.log(f"Removed the local copy of {from_fname}", log_file)
 
-                self.log_writer.start_log(
-                    "exit", self.class_name, method_name,
-                )
-
             else:
                 self.log_writer.log(
-                    f"Option remove is set {delete}, not deleting the file",
+                    f"Option remove is set {delete}, not deleting the file", log_file
                 )
 
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def get_bucket(self, bucket: str, log_file):
+    def copy_data(
+        self, from_fname: str, from_bucket: str, to_file_name, to_bucket: str, log_file
+    ):
         """
-        Method Name :   get_bucket
-        Description :   This method gets the bucket from s3 
+        Method Name :   copy_data
+        Description :   This method copies the data from one bucket to another bucket
 
-        Output      :   A s3 bucket name is returned based on the bucket
+        Output      :   The data is copied from one bucket to another
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
-        method_name = self.get_bucket.__name__
+        method_name = self.copy_data.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            bucket = self.s3_resource.Bucket(bucket)
+            self.storage.copy(from_bucket, from_fname, to_bucket, to_file_name)
 
-            self.log_writer.log(f"Got {bucket} bucket",)
+            self.invalidate_listing_cache(to_bucket, to_file_name)
 
-            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+            self.log_writer.log(
+                f"Copied data from bucket {from_bucket} to bucket {to_bucket}", log_file
+            )
 
-            return bucket
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def copy_data(
-        self, from_fname: str, from_bucket: str, to_file_name, to_bucket: str, log_file
-    ):
+    def copy_files(self, files: list, from_bucket: str, to_bucket: str, log_file):
         """
-        Method Name :   copy_data
-        Description :   This method copies the data from one bucket to another bucket
+        Method Name :   copy_files
+        Description :   This method copies a list of (from file name, to file name) pairs from one bucket to another bucket
+                        concurrently, using a thread pool of max_workers from s3_operations params
 
-        Output      :   The data is copied from one bucket to another
+        Output      :   The files are copied from one bucket to another
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
-        method_name = self.copy_data.__name__
+        method_name = self.copy_files.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            copy_source = {"Bucket": from_bucket, "Key": from_fname}
-
-            self.s3_resource.meta.client.copy(copy_source, to_bucket, to_file_name)
+            if len(files) > 0:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.max_workers, len(files))
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            self.storage.copy,
+                            from_bucket,
+                            from_fname,
+                            to_bucket,
+                            to_fname,
+                        )
+                        for from_fname, to_fname in files
+                    ]
+
+                    for future in futures:
+                        future.result()
+
+                for _, to_fname in files:
+                    self.invalidate_listing_cache(to_bucket, to_fname)
 
             self.log_writer.log(
-                f"Copied data from bucket {from_bucket} to bucket {to_bucket}",
+                f"Copied {len(files)} files from bucket {from_bucket} to bucket {to_bucket}",
+                log_file,
             )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
@@ -436,9 +662,11 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            self.s3_resource.Object(bucket, fname).delete()
+            self.storage.delete(bucket, fname)
 
-            self.log_writer.log(f"Deleted {fname} from bucket {bucket}",)
+            self.invalidate_listing_cache(bucket, fname)
+
+            self.log_writer.log(f"Deleted {fname} from bucket {bucket}", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -464,15 +692,14 @@ class S3_Operation:
 
         try:
             self.copy_data(
-                from_bucket, from_fname, to_bucket, to_file_name,
+                from_fname, from_bucket, to_file_name, to_bucket, log_file
             )
 
-            self.delete_file(
-                from_bucket, file=from_fname,
-            )
+            self.delete_file(from_fname, from_bucket, log_file)
 
             self.log_writer.log(
                 f"Moved {from_fname} from bucket {from_bucket} to {to_bucket}",
+                log_file,
             )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
@@ -480,68 +707,123 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def get_files_from_folder(self, folder_name, bucket: str, log_file):
+    def iter_files_from_folder(
+        self, folder_name: str, bucket: str, log_file, delimiter: str = None
+    ):
         """
-        Method Name :   get_files_from_folder
-        Description :   This method gets the files a folder in s3 bucket
+        Method Name :   iter_files_from_folder
+        Description :   This method lazily streams the files of a folder in s3 bucket page by page. Only the keys inside
+                        the folder are listed, and with a delimiter the sub folders are returned as folder keys
 
-        Output      :   A list of files is returned
+        Output      :   A generator of files is returned
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
-        method_name = self.get_files_from_folder.__name__
+        method_name = self.iter_files_from_folder.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            lst = self.get_file_object(folder_name, bucket, log_file)
+            prefix = folder_name.rstrip("/") + "/"
 
-            list_of_files = [object.key for object in lst]
-
-            self.log_writer.log(f"Got list of files from bucket {bucket}",)
+            keys = (
+                key
+                for key in self.storage.iter_keys(bucket, prefix, delimiter)
+                if key != prefix
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
-            return list_of_files
+            return keys
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def get_file_object(self, fname: str, bucket: str, log_file):
+    def get_files_from_folder(
+        self, folder_name: str, bucket: str, log_file, delimiter: str = None
+    ):
         """
-        Method Name :   get_file_object
-        Description :   This method gets the file object from s3 bucket
+        Method Name :   get_files_from_folder
+        Description :   This method gets the files a folder in s3 bucket. The listing is cached for the run when
+                        listing_cache is set, and the cache is invalidated when a file is written to the folder
 
-        Output      :   A file object is returned
+        Output      :   A list of files is returned
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
-        method_name = self.get_file_object.__name__
+        method_name = self.get_files_from_folder.__name__
 
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            bucket = self.get_bucket(bucket, log_file)
+            key = (bucket, folder_name.rstrip("/") + "/", delimiter)
 
-            lst_objs = [object for object in bucket.objects.filter(Prefix=fname)]
+            list_of_files = self.listing_cache.get(key)
 
-            self.log_writer.log(f"Got {fname} from bucket {bucket}",)
+            if list_of_files is None:
+                list_of_files = list(
+                    self.iter_files_from_folder(
+                        folder_name, bucket, log_file, delimiter
+                    )
+                )
 
-            func = lambda x: x[0] if len(x) == 1 else x
+                if self.use_listing_cache is True:
+                    with self.listing_lock:
+                        self.listing_cache[key] = list_of_files
+
+                self.log_writer.log(
+                    f"Got list of {len(list_of_files)} files from bucket {bucket}",
+                    log_file,
+                )
 
-            file_objs = func(lst_objs)
+            else:
+                self.log_writer.log(
+                    f"Got cached list of {len(list_of_files)} files from bucket {bucket}",
+                    log_file,
+                )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
-            return file_objs
+            return list(list_of_files)
 
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
+    def invalidate_listing_cache(self, bucket: str, fname: str):
+        """
+        Method Name :   invalidate_listing_cache
+        Description :   This method removes the cached listings of the folders containing fname in the bucket
+
+        Output      :   The cached listings which contain fname are removed
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        with self.listing_lock:
+            for key in list(self.listing_cache):
+                if key[0] == bucket and fname.startswith(key[1]):
+                    del self.listing_cache[key]
+
+    @classmethod
+    def clear_listing_cache(cls):
+        """
+        Method Name :   clear_listing_cache
+        Description :   This method clears the cached listings, it is called at the start of every run
+
+        Output      :   The listing cache is cleared
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        with cls.listing_lock:
+            cls.listing_cache.clear()
+
     def load_model(self, model_name, bucket: str, log_file, model_dir=None):
         """
         Method Name :   load_model
@@ -566,15 +848,49 @@ class S3_Operation:
 
             model_file = func()
 
-            self.log_writer.log(log_file == f"Got {model_file} as model file",)
+            self.log_writer.log(f"Got {model_file} as model file", log_file)
+
+            model_obj = self.read_object(model_file, bucket, log_file, decode=False)
 
-            f_obj = self.get_file_object(model_name, bucket, log_file)
+            model = pickle_loads(model_obj)
 
-            model_obj = self.read_object(f_obj, decode=False)
+            self.log_writer.log(f"Loaded {model_name} from bucket {bucket}", log_file)
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return model
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def load_model_from_key(self, fname: str, bucket: str, log_file, etag: str = None):
+        """
+        Method Name :   load_model_from_key
+        Description :   This method loads the model from the exact key in s3 bucket. When etag is given, the etag of
+                        the object is checked against it, so that a model which was changed after it was published
+                        is never loaded
+
+        Output      :   The model is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.load_model_from_key.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            model_obj, model_etag = self.read_object_with_etag(fname, bucket, log_file)
+
+            if etag is not None and model_etag != etag:
+                raise Exception(
+                    f"Etag of {fname} is {model_etag}, but {etag} was expected"
+                )
 
             model = pickle_loads(model_obj)
 
-            self.log_writer.log(f"Loaded {model_name} from bucket {bucket}",)
+            self.log_writer.log(f"Loaded {fname} from bucket {bucket}", log_file)
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
@@ -583,10 +899,96 @@ class S3_Operation:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def save_model(self, model, model_dir, model_bucket: str, log_file, idx=None):
+    def upload_bundle(self, bundle: dict, fname: str, bucket: str, log_file):
+        """
+        Method Name :   upload_bundle
+        Description :   This method uploads the bundle as a single object. The object is a header line with the bundle
+                        magic and the sha256 checksum of the payload, followed by the pickled bundle as payload
+
+        Output      :   The bundle is uploaded to s3 bucket, and the checksum of the payload is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.upload_bundle.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            payload = pickle_dumps(bundle, protocol=HIGHEST_PROTOCOL)
+
+            checksum = sha256(payload).hexdigest()
+
+            header = f"{self.bundle_magic} sha256 {checksum}\n".encode()
+
+            self.upload_object(header + payload, fname, bucket, log_file)
+
+            self.log_writer.log(
+                f"Uploaded bundle of {len(payload)} bytes with {checksum} checksum",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return checksum
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def load_bundle(self, fname: str, bucket: str, log_file, checksum: str = None):
+        """
+        Method Name :   load_bundle
+        Description :   This method loads the bundle with a single get. The checksum in the header is checked against
+                        the payload, and against checksum when it is given, before the payload is unpickled
+
+        Output      :   The bundle is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.load_bundle.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
+
+        try:
+            content = self.read_object(fname, bucket, log_file, decode=False)
+
+            header, sep, payload = content.partition(b"\n")
+
+            parts = header.decode(errors="replace").split(" ")
+
+            if sep != b"\n" or len(parts) != 3 or parts[0] != self.bundle_magic:
+                raise Exception(f"{fname} is not a valid model bundle")
+
+            if sha256(payload).hexdigest() != parts[2]:
+                raise Exception(f"Checksum of {fname} does not match its payload")
+
+            if checksum is not None and checksum != parts[2]:
+                raise Exception(f"Checksum of {fname} does not match {checksum}")
+
+            bundle = pickle_loads(payload)
+
+            self.log_writer.log(
+                f"Loaded bundle of {bundle['version']} version from {bucket} bucket",
+                log_file,
+            )
+
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
+
+            return bundle
+
+        except Exception as e:
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
+
+    def save_model(
+        self, model, model_dir, model_bucket: str, log_file, idx=None, model_name=None
+    ):
         """
         Method Name :   save_model
-        Description :   This method saves the model into particular model directory in s3 bucket with kwargs
+        Description :   This method saves the model into particular model directory in s3 bucket with kwargs.
+                        The model is saved with model_name when it is given, else the name is got from model class
 
         Output      :   A pandas series object consisting of runs for the particular experiment id
         On Failure  :   Write an exception log and then raise an exception
@@ -599,35 +1001,39 @@ class S3_Operation:
         self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
-            model_name = self.model_utils.get_model_name(model, log_file)
+            if model_name is None:
+                model_name = model.__class__.__name__
 
-            func = (
-                lambda: model_name + self.file_format
-                if model_name == "KMeans"
-                else model_name + str(idx) + self.file_format
-            )
-
-            model_file = func()
+                func = (
+                    lambda: "KMeans" + self.file_format
+                    if model_name.endswith("KMeans")
+                    else model_name + str(idx) + self.file_format
+                )
 
-            with open(file=model_file, mode="wb") as f:
-                dump(model, f)
+                model_file = func()
 
-            self.log_writer.log(f"Saved {model_name} model as {model_file} name",)
+            else:
+                model_file = model_name + self.file_format
 
-            bucket_model_path = model_dir + "/" + model_file
+            bucket_model_path = model_dir + model_file
 
-            self.log_writer.log(f"Uploading {model_file} to {model_bucket} bucket",)
+            self.log_writer.log(
+                f"Uploading {model_name} model as {model_file} to {model_bucket} bucket",
+                log_file,
+            )
 
-            self.upload_file(
-                model_file, bucket_model_path, model_bucket,
+            self.upload_object(
+                pickle_dumps(model), bucket_model_path, model_bucket, log_file
             )
 
-            self.log_writer.log(f"Uploaded  {model_file} to {model_bucket} bucket",)
+            self.log_writer.log(
+                f"Uploaded {model_file} to {model_bucket} bucket", log_file
+            )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
         except Exception as e:
-            self.log_writer.log(f"Model file {model_name} could not be saved",)
+            self.log_writer.log(f"Model file {model_name} could not be saved", log_file)
 
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
@@ -652,7 +1058,7 @@ class S3_Operation:
             data_frame.to_csv(local_fname, index=None, header=True)
 
             self.log_writer.log(
-                f"Created a local copy of dataframe with name {local_fname}",
+                f"Created a local copy of dataframe with name {local_fname}", log_file
             )
 
             self.upload_file(local_fname, bucket_fname, bucket, log_file)
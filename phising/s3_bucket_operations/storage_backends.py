@@ -0,0 +1,358 @@
+from abc import ABC, abstractmethod
+from hashlib import md5
+from heapq import merge
+from os import listdir, makedirs, remove, rmdir, walk
+from os.path import dirname, exists, isdir, join, relpath
+from shutil import copyfile
+from threading import Lock
+
+
+class Storage_Backend(ABC):
+    """
+    Description :   This class is the storage backend interface used by S3_Operation. Every backend stores bytes under
+                    bucket and key, raises FileNotFoundError for missing keys, and lists keys lazily in lexicographic
+                    order. With a delimiter, the keys under a sub folder are rolled up into one folder key ending with
+                    the delimiter, so that the pipeline has the same semantics on every backend
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    @abstractmethod
+    def get(self, bucket: str, key: str, byte_range: tuple = None):
+        pass
+
+    @abstractmethod
+    def put(self, bucket: str, key: str, content: bytes):
+        pass
+
+    @abstractmethod
+    def head(self, bucket: str, key: str):
+        pass
+
+    @abstractmethod
+    def copy(self, from_bucket: str, from_key: str, to_bucket: str, to_key: str):
+        pass
+
+    @abstractmethod
+    def delete(self, bucket: str, key: str):
+        pass
+
+    @abstractmethod
+    def iter_keys(self, bucket: str, prefix: str, delimiter: str = None):
+        pass
+
+    def list_keys(self, bucket: str, prefix: str, delimiter: str = None):
+        return list(self.iter_keys(bucket, prefix, delimiter))
+
+    def upload_file(self, local_fname: str, bucket: str, key: str):
+        with open(local_fname, "rb") as f:
+            self.put(bucket, key, f.read())
+
+    @staticmethod
+    def get_etag(content: bytes):
+        return '"' + md5(content).hexdigest() + '"'
+
+    @staticmethod
+    def group_keys(keys, prefix: str, delimiter: str = None):
+        last_folder = None
+
+        for key in keys:
+            idx = -1 if delimiter is None else key.find(delimiter, len(prefix))
+
+            if idx == -1:
+                yield key
+
+            elif key[: idx + 1] != last_folder:
+                last_folder = key[: idx + 1]
+
+                yield last_folder
+
+    @staticmethod
+    def slice_range(content: bytes, byte_range: tuple = None):
+        if byte_range is None:
+            return content
+
+        return content[byte_range[0] : byte_range[1] + 1]
+
+
+class S3_Storage(Storage_Backend):
+    """
+    Description :   This class is the storage backend for AWS S3, using boto3
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, page_size: int = 1000):
+        from boto3 import client
+
+        self.s3_client = client("s3")
+
+        self.page_size = page_size
+
+    @staticmethod
+    def is_not_found(e):
+        return e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound")
+
+    @staticmethod
+    def is_invalid_range(e):
+        return e.response["Error"]["Code"] in ("416", "InvalidRange")
+
+    def get(self, bucket: str, key: str, byte_range: tuple = None):
+        from botocore.exceptions import ClientError
+
+        kwargs = {} if byte_range is None else {"Range": "bytes=%d-%d" % byte_range}
+
+        try:
+            res = self.s3_client.get_object(Bucket=bucket, Key=key, **kwargs)
+
+        except ClientError as e:
+            if self.is_not_found(e):
+                raise FileNotFoundError(f"{key} does not exist in {bucket} bucket")
+
+            ## A ranged get of a zero byte object fails with 416, the object is read as empty like on the
+            ## other backends
+
+            if byte_range is not None and self.is_invalid_range(e):
+                etag = self.head(bucket, key)
+
+                if etag is None:
+                    raise FileNotFoundError(f"{key} does not exist in {bucket} bucket")
+
+                return b"", etag
+
+            raise e
+
+        return res["Body"].read(), res["ETag"]
+
+    def put(self, bucket: str, key: str, content: bytes):
+        return self.s3_client.put_object(Bucket=bucket, Key=key, Body=content)["ETag"]
+
+    def head(self, bucket: str, key: str):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+
+        except ClientError as e:
+            if self.is_not_found(e):
+                return None
+
+            raise e
+
+    def copy(self, from_bucket: str, from_key: str, to_bucket: str, to_key: str):
+        self.s3_client.copy({"Bucket": from_bucket, "Key": from_key}, to_bucket, to_key)
+
+    def delete(self, bucket: str, key: str):
+        self.s3_client.delete_object(Bucket=bucket, Key=key)
+
+    def iter_keys(self, bucket: str, prefix: str, delimiter: str = None):
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+
+        kwargs = {} if delimiter is None else {"Delimiter": delimiter}
+
+        pages = paginator.paginate(
+            Bucket=bucket,
+            Prefix=prefix,
+            PaginationConfig={"PageSize": self.page_size},
+            **kwargs,
+        )
+
+        ## S3 lists the keys and common prefixes of every page in lexicographic order, so the pages are
+        ## merged as they are, like the listing of the other backends
+
+        for page in pages:
+            keys = (obj["Key"] for obj in page.get("Contents", []))
+
+            prefixes = (obj["Prefix"] for obj in page.get("CommonPrefixes", []))
+
+            yield from merge(keys, prefixes)
+
+    def upload_file(self, local_fname: str, bucket: str, key: str):
+        self.s3_client.upload_file(local_fname, bucket, key)
+
+
+class Local_Storage(Storage_Backend):
+    """
+    Description :   This class is the storage backend for a local directory, every bucket is a folder in root dir.
+                    Folder keys ending with / are stored as folders, and only the empty folders are listed as keys
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def get_path(self, bucket: str, key: str):
+        return join(self.root_dir, bucket, *key.split("/"))
+
+    def get(self, bucket: str, key: str, byte_range: tuple = None):
+        path = self.get_path(bucket, key)
+
+        if key.endswith("/") and isdir(path):
+            return b"", self.get_etag(b"")
+
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+
+        except (FileNotFoundError, IsADirectoryError):
+            raise FileNotFoundError(f"{key} does not exist in {bucket} bucket")
+
+        return self.slice_range(content, byte_range), self.get_etag(content)
+
+    def put(self, bucket: str, key: str, content: bytes):
+        path = self.get_path(bucket, key)
+
+        if key.endswith("/"):
+            makedirs(path, exist_ok=True)
+
+        else:
+            makedirs(dirname(path), exist_ok=True)
+
+            with open(path, "wb") as f:
+                f.write(content)
+
+        return self.get_etag(content)
+
+    def head(self, bucket: str, key: str):
+        try:
+            return self.get(bucket, key)[1]
+
+        except FileNotFoundError:
+            return None
+
+    def copy(self, from_bucket: str, from_key: str, to_bucket: str, to_key: str):
+        from_path = self.get_path(from_bucket, from_key)
+
+        if not exists(from_path):
+            raise FileNotFoundError(
+                f"{from_key} does not exist in {from_bucket} bucket"
+            )
+
+        to_path = self.get_path(to_bucket, to_key)
+
+        makedirs(dirname(to_path), exist_ok=True)
+
+        copyfile(from_path, to_path)
+
+    def delete(self, bucket: str, key: str):
+        path = self.get_path(bucket, key)
+
+        if isdir(path):
+            if len(listdir(path)) == 0:
+                rmdir(path)
+
+        elif exists(path):
+            remove(path)
+
+    def iter_keys(self, bucket: str, prefix: str, delimiter: str = None):
+        bucket_dir = join(self.root_dir, bucket)
+
+        keys = []
+
+        for root, dirs, files in walk(bucket_dir):
+            rel_dir = relpath(root, bucket_dir).replace("\\", "/")
+
+            rel_dir = "" if rel_dir == "." else rel_dir + "/"
+
+            keys.extend(
+                rel_dir + d + "/" for d in dirs if len(listdir(join(root, d))) == 0
+            )
+
+            keys.extend(rel_dir + f for f in files)
+
+        keys = sorted(key for key in keys if key.startswith(prefix))
+
+        return self.group_keys(keys, prefix, delimiter)
+
+    def upload_file(self, local_fname: str, bucket: str, key: str):
+        path = self.get_path(bucket, key)
+
+        makedirs(dirname(path), exist_ok=True)
+
+        copyfile(local_fname, path)
+
+
+class Memory_Storage(Storage_Backend):
+    """
+    Description :   This class is the in-memory storage backend, the objects are shared by all the instances in the
+                    process, so that every stage of the pipeline sees the same buckets
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    objects = {}
+
+    lock = Lock()
+
+    def get(self, bucket: str, key: str, byte_range: tuple = None):
+        try:
+            content, etag = self.objects[(bucket, key)]
+
+        except KeyError:
+            raise FileNotFoundError(f"{key} does not exist in {bucket} bucket")
+
+        return self.slice_range(content, byte_range), etag
+
+    def put(self, bucket: str, key: str, content: bytes):
+        etag = self.get_etag(content)
+
+        with self.lock:
+            self.objects[(bucket, key)] = (bytes(content), etag)
+
+        return etag
+
+    def head(self, bucket: str, key: str):
+        obj = self.objects.get((bucket, key))
+
+        return None if obj is None else obj[1]
+
+    def copy(self, from_bucket: str, from_key: str, to_bucket: str, to_key: str):
+        content, _ = self.get(from_bucket, from_key)
+
+        self.put(to_bucket, to_key, content)
+
+    def delete(self, bucket: str, key: str):
+        with self.lock:
+            self.objects.pop((bucket, key), None)
+
+    def iter_keys(self, bucket: str, prefix: str, delimiter: str = None):
+        with self.lock:
+            keys = [k for b, k in self.objects if b == bucket and k.startswith(prefix)]
+
+        return self.group_keys(sorted(keys), prefix, delimiter)
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.objects.clear()
+
+
+def get_storage_backend(storage_params: dict):
+    """
+    Method Name :   get_storage_backend
+    Description :   This method gets the storage backend based on the backend in storage params
+
+    Output      :   A storage backend object is returned
+    On Failure  :   Raise ValueError when the backend is not valid
+
+    Version     :   1.2
+    Revisions   :   moved setup to cloud
+    """
+    backend = storage_params["backend"]
+
+    if backend == "s3":
+        return S3_Storage(storage_params["page_size"])
+
+    elif backend == "local":
+        return Local_Storage(storage_params["local_dir"])
+
+    elif backend == "memory":
+        return Memory_Storage()
+
+    else:
+        raise ValueError(f"{backend} is not a valid storage backend")
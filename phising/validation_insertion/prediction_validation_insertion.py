@@ -1,6 +1,6 @@
-from phising.data_transform.data_transformation_pred import Data_Transform_Pred
 from phising.data_type_valid.data_type_valid_pred import DB_Operation_Pred
 from phising.raw_data_validation.pred_data_validation import Raw_Pred_Data_Validation
+from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
 from utils.read_params import read_params
 
@@ -17,8 +17,6 @@ class Pred_Validation:
     def __init__(self, bucket):
         self.raw_data = Raw_Pred_Data_Validation(raw_data_bucket=bucket)
 
-        self.data_transform = Data_Transform_Pred()
-
         self.db_operation = DB_Operation_Pred()
 
         self.config = read_params()
@@ -50,9 +48,11 @@ class Pred_Validation:
 
         try:
             self.log_writer.start_log(
-                "start", self.class_name, method_name,
+                "start", self.class_name, method_name, self.pred_main_log,
             )
 
+            S3_Operation.clear_listing_cache()
+
             (
                 LengthOfDateStampInFile,
                 LengthOfTimeStampInFile,
@@ -66,20 +66,18 @@ class Pred_Validation:
                 regex, LengthOfDateStampInFile, LengthOfTimeStampInFile
             )
 
-            self.raw_data.validate_col_length(NumberofColumns=noofcolumns)
+            self.raw_data.validate_col_length(
+                NumberofColumns=noofcolumns, column_names=column_names
+            )
 
-            self.raw_data.validate_missing_values_in_col()
+            self.raw_data.validate_missing_values_in_col(column_names=column_names)
 
             self.log_writer.log("Raw Data Validation Completed !!", self.pred_main_log)
 
-            self.log_writer.log("Starting Data Transformation", self.pred_main_log)
-
-            self.data_transform.add_quotes_to_string()
-
-            self.log_writer.log("Data Transformation completed !!", self.pred_main_log)
-
             self.db_operation.insert_good_data_as_record(
-                self.good_data_db_name, self.good_data_collection_name
+                self.good_data_db_name,
+                self.good_data_collection_name,
+                column_names=column_names,
             )
 
             self.log_writer.log(
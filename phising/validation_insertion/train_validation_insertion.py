@@ -1,6 +1,6 @@
-from phising.data_transform.data_transformation_train import Data_Transform_Train
 from phising.data_type_valid.data_type_valid_train import DB_Operation_Train
 from phising.raw_data_validation.train_data_validation import Raw_Train_Data_Validation
+from phising.s3_bucket_operations.s3_operations import S3_Operation
 from utils.logger import App_Logger
 from utils.read_params import read_params
 
@@ -17,8 +17,6 @@ class Train_Validation:
     def __init__(self, bucket):
         self.raw_data = Raw_Train_Data_Validation(raw_data_bucket=bucket)
 
-        self.data_transform = Data_Transform_Train()
-
         self.db_operation = DB_Operation_Train()
 
         self.config = read_params()
@@ -53,6 +51,8 @@ class Train_Validation:
                 "start", self.class_name, method_name, self.train_main_log,
             )
 
+            S3_Operation.clear_listing_cache()
+
             (
                 LengthOfDateStampInFile,
                 LengthOfTimeStampInFile,
@@ -66,20 +66,18 @@ class Train_Validation:
                 regex, LengthOfDateStampInFile, LengthOfTimeStampInFile
             )
 
-            self.raw_data.validate_col_length(NumberofColumns=noofcolumns)
+            self.raw_data.validate_col_length(
+                NumberofColumns=noofcolumns, column_names=column_names
+            )
 
-            self.raw_data.validate_missing_values_in_col()
+            self.raw_data.validate_missing_values_in_col(column_names=column_names)
 
             self.log_writer.log("Raw Data Validation Completed !!", self.train_main_log)
 
-            self.log_writer.log("Starting Data Transformation", self.train_main_log)
-
-            self.data_transform.add_quotes_to_string()
-
-            self.log_writer.log("Data Transformation completed !!", self.train_main_log)
-
             self.db_operation.insert_good_data_as_record(
-                self.good_data_db_name, self.good_data_collection_name
+                self.good_data_db_name,
+                self.good_data_collection_name,
+                column_names=column_names,
             )
 
             self.log_writer.log(
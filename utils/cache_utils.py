@@ -0,0 +1,120 @@
+from copy import deepcopy
+from threading import Lock
+from time import monotonic
+
+from phising.s3_bucket_operations.s3_operations import S3_Operation
+
+from utils.logger import App_Logger
+from utils.read_params import read_params
+
+
+class Control_File_Cache:
+    """
+    Description :   This class is used for caching the control files like schema and regex files, along with their
+                    parsed values. The cache is shared by all the validators in the process, and entries are keyed by
+                    bucket and file name, and versioned by the s3 etag. The S3_Operation of the caller is reused,
+                    and a copy of the parsed value is returned, so that a caller can not change the cached entry
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    entries = {}
+
+    lock = Lock()
+
+    def __init__(self, log_file, s3: S3_Operation = None):
+        self.log_writer = App_Logger()
+
+        self.config = read_params()
+
+        self.class_name = self.__class__.__name__
+
+        self.log_file = log_file
+
+        self.ttl = self.config["control_file_cache"]["ttl"]
+
+        self.s3 = S3_Operation() if s3 is None else s3
+
+    def get(self, fname: str, bucket: str, parser):
+        """
+        Method Name :   get
+        Description :   This method gets the parsed control file from cache. Within ttl no s3 request is made, after ttl
+                        the etag is checked with a head request and the file is fetched and parsed again only when the
+                        etag has changed
+
+        Output      :   A copy of the parsed value of the control file is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            key = (bucket, fname)
+
+            with self.lock:
+                entry = self.entries.get(key)
+
+            if entry is not None and monotonic() - entry["fetched_at"] < self.ttl:
+                self.log_writer.log(
+                    f"Got {fname} from cache with etag {entry['etag']}", self.log_file
+                )
+
+            elif entry is not None and entry["etag"] == self.s3.get_etag(
+                fname, bucket, self.log_file
+            ):
+                entry["fetched_at"] = monotonic()
+
+                self.log_writer.log(
+                    f"Revalidated {fname} in cache with etag {entry['etag']}",
+                    self.log_file,
+                )
+
+            else:
+                content, etag = self.s3.read_object_with_etag(
+                    fname, bucket, self.log_file
+                )
+
+                entry = {
+                    "etag": etag,
+                    "value": parser(content),
+                    "fetched_at": monotonic(),
+                }
+
+                with self.lock:
+                    self.entries[key] = entry
+
+                self.log_writer.log(
+                    f"Fetched {fname} from {bucket} bucket with etag {etag} to cache",
+                    self.log_file,
+                )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return deepcopy(entry["value"])
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    @classmethod
+    def clear(cls):
+        """
+        Method Name :   clear
+        Description :   This method clears all the entries of the cache
+
+        Output      :   The cache is cleared
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        with cls.lock:
+            cls.entries.clear()
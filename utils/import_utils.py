@@ -0,0 +1,108 @@
+from importlib import import_module
+from sys import modules
+from time import perf_counter
+
+from utils.logger import App_Logger
+
+
+class Import_Utils:
+    """
+    Description :   This class is used for importing the modules when they are needed and reporting their import cost
+    
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud 
+    """
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+
+        self.log_writer = App_Logger()
+
+        self.class_name = self.__class__.__name__
+
+        self.import_costs = {}
+
+    def import_modules(self, module_names: list):
+        """
+        Method Name :   import_modules
+        Description :   This method imports the modules one by one and records the time taken by every import. 
+                        The time taken includes the dependencies which were loaded for the first time by the module
+
+        Output      :   A dictionary of module name to the import time in seconds
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.import_modules.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            for module_name in module_names:
+                start = perf_counter()
+
+                import_module(module_name)
+
+                self.import_costs[module_name] = perf_counter() - start
+
+                self.log_writer.log(
+                    f"Imported {module_name} in {self.import_costs[module_name]:.3f} seconds",
+                    self.log_file,
+                )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return self.import_costs
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def report_import_costs(self):
+        """
+        Method Name :   report_import_costs
+        Description :   This method logs the import cost of every imported module along with the top level packages
+                        loaded in the process
+
+        Output      :   A dictionary with the import costs and the loaded top level packages
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.report_import_costs.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            loaded_packages = sorted({name.split(".")[0] for name in list(modules)})
+
+            report = {
+                "import_costs": self.import_costs,
+                "total_import_cost": sum(self.import_costs.values()),
+                "loaded_packages": loaded_packages,
+            }
+
+            self.log_writer.log(
+                f"Import cost report is {report['import_costs']}, total import cost is {report['total_import_cost']:.3f} seconds",
+                self.log_file,
+            )
+
+            self.log_writer.log(
+                f"Loaded packages are {loaded_packages}", self.log_file
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return report
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
@@ -1,4 +1,4 @@
-from logging import DEBUG, basicConfig, error, info
+from logging import DEBUG, basicConfig, error, info, warning
 from os import makedirs
 from os.path import join
 
@@ -32,6 +32,22 @@ class App_Logger:
         except Exception as e:
             raise e
 
+    def warning_log(self, log_info: str, log_file):
+        try:
+            log_file_path = join("logs", log_file)
+
+            basicConfig(
+                filename=log_file_path,
+                level=DEBUG,
+                format="%(asctime)s %(levelname)s %(message)s",
+                datefmt="%d-%m-%Y %H:%M:%S",
+            )
+
+            warning(msg=log_info)
+
+        except Exception as e:
+            raise e
+
     def start_log(self, key: str, class_name: str, method_name: str, log_file):
         """
         Method Name :   start_log
@@ -1,6 +1,4 @@
 from mlflow import start_run
-from phising.mlflow_utils.mlflow_operations import MLFlow_Operation
-from phising.model_finder.tuner import Model_Finder
 from phising.s3_bucket_operations.s3_operations import S3_Operation
 from sklearn.metrics import accuracy_score, roc_auc_score
 from sklearn.model_selection import GridSearchCV, train_test_split
@@ -24,22 +22,20 @@ class Model_Utils:
 
         self.tuner_kwargs = self.config["model_utils"]
 
-        self.split_kwargs = self.config["base"]
+        self.split_kwargs = {
+            key: self.config["base"][key] for key in ("test_size", "random_state")
+        }
 
         self.train_model_dir = self.config["models_dir"]["trained"]
 
         self.save_format = self.config["model_save_format"]
 
-        self.model_bucket = self.config["s3_bucket"]["model"]
+        self.model_bucket = self.config["s3_bucket"]["phising_model"]
 
         self.exp_name = self.config["mlflow_config"]["experiment_name"]
 
         self.run_name = self.config["mlflow_config"]["run_name"]
 
-        self.mlflow_op = MLFlow_Operation()
-
-        self.model_finder = Model_Finder()
-
         self.s3 = S3_Operation()
 
         self.class_name = self.__class__.__name__
@@ -66,21 +62,21 @@ class Model_Utils:
             preds = model.predict(test_x)
 
             self.log_writer.log(
-                log_file, f"Used {model_name} model to get predictions on test data"
+                f"Used {model_name} model to get predictions on test data", log_file
             )
 
             if len(test_y.unique()) == 1:
                 model_score = accuracy_score(test_y, preds)
 
                 self.log_writer.log(
-                    log_file, f"Accuracy for {model_name} is {model_score}"
+                    f"Accuracy for {model_name} is {model_score}", log_file
                 )
 
             else:
                 model_score = roc_auc_score(test_y, preds)
 
                 self.log_writer.log(
-                    log_file, f"AUC score for {model_name} is {model_score}"
+                    f"AUC score for {model_name} is {model_score}", log_file
                 )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
@@ -109,22 +105,22 @@ class Model_Utils:
         try:
             model_name = model.__class__.__name__
 
-            model_param_grid = self.config[model_name]
+            model_param_grid = self.config["model_params"][model_name]
 
             model_grid = GridSearchCV(
                 estimator=model, param_grid=model_param_grid, **self.tuner_kwargs
             )
 
             self.log_writer.log(
-                log_file,
                 f"Initialized {model_grid.__class__.__name__}  with {model_param_grid} as params",
+                log_file,
             )
 
             model_grid.fit(x_train, y_train)
 
             self.log_writer.log(
-                log_file,
                 f"Found the best params for {model_name} model based on {model_param_grid} as params",
+                log_file,
             )
 
             self.log_writer.start_log("exit", self.class_name, method_name, log_file)
@@ -134,10 +130,25 @@ class Model_Utils:
         except Exception as e:
             self.log_writer.exception_log(e, self.class_name, method_name, log_file)
 
-    def train_and_log_models(self, X_data, Y_data, log_file, idx=None, kmeans=None):
+    def train_and_log_models(self, X_data, Y_data, log_file, mlflow_op, idx=None):
+        """
+        Method Name :   train_and_log_models
+        Description :   This method trains the models on the data of the cluster and logs them to a run nested in
+                        the active session run. The params and metrics of the run are logged with a single batch call,
+                        the models are saved and registered by the background worker of mlflow_op
+
+        Output      :   The trained models are saved to s3 bucket and logged to mlflow
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        # tuner imports model utils, so model finder is imported here
+        from phising.model_finder.tuner import Model_Finder
+
         method_name = self.train_and_log_models.__name__
 
-        self.log_writer.start_log("start", log_file, self.class_name, method_name)
+        self.log_writer.start_log("start", self.class_name, method_name, log_file)
 
         try:
             x_train, x_test, y_train, y_test = train_test_split(
@@ -145,41 +156,40 @@ class Model_Utils:
             )
 
             self.log_writer.log(
-                log_file,
                 f"Performed train test split with kwargs as {self.split_kwargs}",
+                log_file,
             )
 
-            lst = self.model_finder.get_trained_models(x_train, y_train, x_test, y_test)
-
-            self.log_writer.log(log_file, "Got trained models")
-
-            for _, tm in enumerate(lst):
-                self.s3.save_model(
-                    tm[0],
-                    self.train_model_dir,
-                    self.model_bucket,
-                    log_file,
-                    format=self.save_format,
-                )
-
-                self.mlflow_op.set_mlflow_tracking_uri()
+            lst = Model_Finder(log_file).get_trained_models(
+                x_train, y_train, x_test, y_test
+            )
 
-                self.mlflow_op.set_mlflow_experiment(self.exp_name)
+            self.log_writer.log("Got trained models", log_file)
 
-                with start_run(run_name=self.run_name):
-                    self.mlflow_op.log_all_for_model(idx, tm[0], tm[1])
+            with start_run(
+                run_name=f"{self.run_name}-{idx}",
+                nested=True,
+                tags={"run_type": "cluster", "cluster": str(idx)},
+            ) as run:
+                for model, model_score in lst:
+                    mlflow_op.submit_model_log(
+                        self.s3.save_model,
+                        model,
+                        self.train_model_dir,
+                        self.model_bucket,
+                        log_file,
+                        idx,
+                    )
 
-                    if kmeans is not None:
-                        self.mlflow_op.log_all_for_model(None, kmeans, None)
+                    mlflow_op.log_all_for_model(model, model_score, idx, run.info.run_id)
 
-                    else:
-                        pass
+                mlflow_op.flush_run_batch(run.info.run_id)
 
             self.log_writer.log(
-                log_file, "Saved and logged all trained models to mlflow"
+                "Saved and logged all trained models to mlflow", log_file
             )
 
-            self.log_writer.start_log("exit", log_file, self.class_name, method_name)
+            self.log_writer.start_log("exit", self.class_name, method_name, log_file)
 
         except Exception as e:
-            self.log_writer.exception_log(e, log_file, self.class_name, method_name)
+            self.log_writer.exception_log(e, self.class_name, method_name, log_file)
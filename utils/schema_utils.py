@@ -0,0 +1,271 @@
+from hashlib import sha256
+from io import BytesIO
+from json import dumps
+
+from pandas import read_csv
+from phising.s3_bucket_operations.s3_operations import S3_Operation
+
+from utils.logger import App_Logger
+from utils.read_params import read_params
+
+
+class Schema_Utils:
+    """
+    Description :   This class is used for parsing the batch files with the types and columns from schema
+
+    Version     :   1.2
+    Revisions   :   Moved to setup to cloud
+    """
+
+    def __init__(self, log_file):
+        self.log_writer = App_Logger()
+
+        self.config = read_params()
+
+        self.class_name = self.__class__.__name__
+
+        self.log_file = log_file
+
+        self.na_values = self.config["missing_values"]["na_values"]
+
+        self.csv_parser_params = self.config["csv_parser"]
+
+        self.s3 = S3_Operation()
+
+    def get_read_csv_kwargs(self, column_names: dict):
+        """
+        Method Name :   get_read_csv_kwargs
+        Description :   This method builds the read_csv kwargs from the column names and types of the schema.
+                        Every column gets an explicit dtype, so that pandas does not infer the types on every file
+
+        Output      :   A dictionary of dtype, usecols, na_values and engine kwargs for pandas read_csv
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_read_csv_kwargs.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            dtypes = self.csv_parser_params["dtypes"]
+
+            default_dtype = self.csv_parser_params["default_dtype"]
+
+            read_csv_kwargs = {
+                "dtype": {
+                    col: dtypes.get(col_type, default_dtype)
+                    for col, col_type in column_names.items()
+                },
+                "usecols": list(column_names),
+                "na_values": self.na_values,
+                "engine": self.csv_parser_params["engine"],
+            }
+
+            self.log_writer.log(
+                f"Built read_csv kwargs for {len(column_names)} columns from schema",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return read_csv_kwargs
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_unknown_cols(
+        self, fname: str, bucket: str, column_names: dict, cols: list = None
+    ):
+        """
+        Method Name :   get_unknown_cols
+        Description :   This method reads only the header of the csv file and gets the columns which are not in schema.
+                        The header is not read when the columns of the file are given
+
+        Output      :   A list of unknown columns is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_unknown_cols.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if cols is None:
+                cols = self.s3.read_header(fname, bucket, self.log_file)
+
+            unknown_cols = [col for col in cols if col not in column_names]
+
+            self.log_writer.log(
+                f"Got {len(unknown_cols)} unknown columns in {fname} file", self.log_file
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return unknown_cols
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def reject_file(self, fname: str, bucket: str, bad_dir: str, reason: str):
+        """
+        Method Name :   reject_file
+        Description :   This method rejects the csv file, the file is moved to bad_dir when it is given
+
+        Output      :   The file is moved to bad data folder
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.reject_file.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            if bad_dir is not None:
+                self.s3.move_data(
+                    fname,
+                    bucket,
+                    bad_dir + "/" + fname.split("/")[-1],
+                    bucket,
+                    self.log_file,
+                )
+
+            self.log_writer.log(
+                f"Rejected {fname} file to {bad_dir} folder, {reason}", self.log_file
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def read_csv_from_folder(
+        self,
+        folder_name: str,
+        bucket: str,
+        column_names: dict,
+        headers: dict = None,
+        bad_dir: str = None,
+    ):
+        """
+        Method Name :   read_csv_from_folder
+        Description :   This method reads the csv files from folder as typed dataframes. The files having columns
+                        which are not in schema are rejected from the header, before they are fully fetched. The
+                        headers already read for the files can be given, so that they are not fetched again. The
+                        files having columns which are not in schema, or values which can not be parsed with the
+                        schema types, are moved to bad_dir
+
+        Output      :   A list of tuple of dataframe, along with absolute file name and file name is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.read_csv_from_folder.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            read_csv_kwargs = self.get_read_csv_kwargs(column_names)
+
+            files = self.s3.get_files_from_folder(folder_name, bucket, self.log_file)
+
+            lst = []
+
+            for f in files:
+                if not f.endswith(".csv"):
+                    continue
+
+                unknown_cols = self.get_unknown_cols(
+                    f, bucket, column_names, (headers or {}).get(f)
+                )
+
+                if len(unknown_cols) > 0:
+                    self.reject_file(
+                        f, bucket, bad_dir, f"unknown columns are {unknown_cols}"
+                    )
+
+                    continue
+
+                content = self.s3.read_object(f, bucket, self.log_file, decode=False)
+
+                ## A value which is neither a number nor a missing value token fails the typed parse, only
+                ## the file is rejected so that the rest of the batch is still validated
+
+                try:
+                    df = read_csv(BytesIO(content), **read_csv_kwargs)
+
+                except ValueError as e:
+                    self.reject_file(f, bucket, bad_dir, f"parse error is {e}")
+
+                    continue
+
+                lst.append((df, f, f.split("/")[-1]))
+
+            self.log_writer.log(
+                f"Read {len(lst)} typed csv files from {folder_name} folder from {bucket} bucket",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return lst
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )
+
+    def get_schema_hash(self, columns: list):
+        """
+        Method Name :   get_schema_hash
+        Description :   This method gets the hash of the ordered feature columns, which is used to check that a model
+                        is given the same features which it was trained on
+
+        Output      :   A sha256 hex digest of the feature columns is returned
+        On Failure  :   Write an exception log and then raise an exception
+
+        Version     :   1.2
+        Revisions   :   moved setup to cloud
+        """
+        method_name = self.get_schema_hash.__name__
+
+        self.log_writer.start_log("start", self.class_name, method_name, self.log_file)
+
+        try:
+            schema_hash = sha256(dumps(list(columns)).encode()).hexdigest()
+
+            self.log_writer.log(
+                f"Got {schema_hash} as schema hash for {len(columns)} columns",
+                self.log_file,
+            )
+
+            self.log_writer.start_log(
+                "exit", self.class_name, method_name, self.log_file
+            )
+
+            return schema_hash
+
+        except Exception as e:
+            self.log_writer.exception_log(
+                e, self.class_name, method_name, self.log_file
+            )